@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+'''
+Offline benchmark of the whole edit pipeline: WAV fixture -> Stt -> edit backend -> paste,
+with keyboard and clipboard mocked out. Sound cues play on the default output device and the time from
+play() to their first sample reaching it is reported, `--no-cues` turns them off.
+
+The fixtures directory holds <name>.wav with a spoken instruction (mono 16-bit PCM, all at one rate)
+and optionally <name>.txt with the text to edit. Options not listed here are passed on to the app,
+e.g. `--vad-silence 0.5` or `--backend http --api-base http://127.0.0.1:8111/v1`.
+'''
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import glob
+import json
+import resource
+import time
+import wave
+
+import numpy as np
+
+import core
+import editing
+import llm
+from capture import WavCapture
+from fake_keyboard import FakeKeyboard
+from speculate import Speculator
+
+STAGES = ['capture', 'recognition', 'llm', 'paste', 'total']
+
+
+class TimedBackend(llm.EditBackend):
+    """Counts the time spent waiting for the wrapped backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.reset()
+
+    def reset(self):
+        self.elapsed = 0.0
+
+    def connect(self):
+        self.backend.connect()
+
+    def edit(self, text, instruction, context=None):
+        began = time.perf_counter()
+        result = self.backend.edit(text, instruction, context)
+        self.elapsed += time.perf_counter() - began
+        return result
+
+    def stream(self, text, instruction, context=None):
+        pieces = self.backend.stream(text, instruction, context)
+        while True:
+            began = time.perf_counter()
+            piece = next(pieces, None)
+            self.elapsed += time.perf_counter() - began
+            if piece is None:
+                return
+            yield piece
+
+
+def percentiles(values):
+    values = np.array(values)
+    return {'p50': float(np.percentile(values, 50)), 'p90': float(np.percentile(values, 90)),
+            'p99': float(np.percentile(values, 99)), 'mean': float(values.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('fixtures', help='directory with WAV files and input texts')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per fixture')
+    parser.add_argument('--realtime', action='store_true',
+                        help='feed audio at the speed of a microphone instead of as fast as possible')
+    parser.add_argument('-o', '--output', type=str, metavar='JSON', help='where to write the results')
+    args, app_argv = parser.parse_known_args()
+
+    wavs = sorted(glob.glob(os.path.join(args.fixtures, '*.wav')))
+    if not wavs:
+        parser.exit(1, f'no WAV files in {args.fixtures}\n')
+    with wave.open(wavs[0], 'rb') as wf:
+        samplerate = wf.getframerate()
+
+    keyboard = FakeKeyboard(None)
+    for module in (core, editing):
+        module.keyboard = keyboard
+
+    service = core.service
+    service.osd.start()
+    service.osd.ready.wait()
+    defaults = ['--samplerate', str(samplerate), '--backend', 'echo', '--no-cache', '--preroll', '0',
+                '--trace-file', '', '--clipboard', 'mock']
+    service.init(defaults + app_argv, capture=WavCapture(samplerate, 1), actions=['edit'])
+    stt, app = service.stt, service.actions['edit']
+    clipboard = keyboard.clipboard = service.clipboard
+    stt.capture.blocksize = stt.args.samplerate * stt.args.block_ms // 1000
+    stt.capture.realtime = args.realtime
+    backend = TimedBackend(app.backend)
+    app.backend = backend
+    if app.speculator is not None:
+        app.speculator = Speculator(backend)
+
+    timings = {}
+    record_once = stt.record_once
+
+    def timed_record_once(*a, **kw):
+        began = time.perf_counter()
+        instruction = record_once(*a, **kw)
+        timings['record'] = time.perf_counter() - began
+        timings['instruction'] = instruction
+        return instruction
+    stt.record_once = timed_record_once
+
+    runs = []
+    for wav in wavs:
+        txt = wav[:-len('.wav')] + '.txt'
+        text = open(txt).read() if os.path.exists(txt) else 'The quick brown fox jumps over the lazy dog.'
+        duration = stt.capture.load(wav)
+        for _ in range(args.repeat):
+            keyboard.document = text
+            keyboard.cursor, keyboard.anchor = len(text), None
+            clipboard.text = 'clipboard before the edit'
+            backend.reset()
+            timings.clear()
+            began = time.perf_counter()
+            app.run()
+            ended = time.perf_counter()
+            stages = app.trace.stages()
+            capture_time = stt.capture.read_time
+            recognition = timings['record'] - capture_time
+            runs.append({
+                'file': os.path.basename(wav),
+                'instruction': timings['instruction'],
+                'audio_seconds': duration,
+                'capture': capture_time,
+                'recognition': recognition,
+                'llm': backend.elapsed,
+                # from when the result was there, the backend's or the fast path's
+                'paste': stages.get('paste', 0.0),
+                'total': ended - began,
+                'rtf': recognition / duration if duration else 0.0,
+                'clipboard_restored': clipboard.text == 'clipboard before the edit',
+                'route': app.trace.tags.get('route'),
+                'trace': stages,
+            })
+
+    results = {
+        'runs': runs,
+        'stages': {stage: percentiles([r[stage] for r in runs]) for stage in STAGES},
+        'rtf': percentiles([r['rtf'] for r in runs]),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'argv': app_argv,
+    }
+    # the audio callback appends to them until the stream stops
+    service.cues.stop()
+    cue_latencies = list(service.cues.latencies)
+    if cue_latencies:
+        results['cue'] = percentiles(cue_latencies)
+
+    print(f'{"stage":<12} {"p50":>8} {"p90":>8} {"p99":>8}')
+    for stage in STAGES + ['rtf']:
+        p = results['stages'].get(stage) or results['rtf']
+        print(f'{stage:<12} {p["p50"]:>8.3f} {p["p90"]:>8.3f} {p["p99"]:>8.3f}')
+    if 'cue' in results:
+        p = results['cue']
+        print(f'{"cue":<12} {p["p50"]:>8.3f} {p["p90"]:>8.3f} {p["p99"]:>8.3f}')
+    print(f'peak RSS {results["peak_rss_mb"]:.0f}MB')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+'''
+Cost of handing one audio block from the input callback to the recording thread:
+copying it to bytes and queueing it versus writing it into the capture's ring buffer.
+'''
+
+import argparse
+import queue
+import time
+import tracemalloc
+
+import numpy as np
+
+from capture import Capture
+
+
+def queue_path(blocks):
+    """The callback of the previous capture: a bytes copy queued for every reader."""
+    sessions = [queue.Queue()]
+    for block in blocks:
+        data = bytes(block)
+        for session in sessions:
+            session.put(data)
+        sessions[0].get()
+
+
+def ring_path(capture, blocks):
+    session = capture.session()
+    for block in blocks:
+        capture.write(np.frombuffer(block, dtype=np.int16))
+        session.get()
+
+
+def measure(name, run, count):
+    began = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - began
+    # a second run for allocations, tracing them slows everything down
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics('filename'))
+    print(f'{name:<8} {elapsed / count * 1e6:>8.1f}us per block, '
+          f'peak allocation {peak / 1024:>7.1f}KB, still held {allocated / 1024:>7.1f}KB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-r', '--samplerate', type=int, default=16000)
+    parser.add_argument('--block-ms', type=int, default=100)
+    parser.add_argument('--blocks', type=int, default=10000)
+    args = parser.parse_args()
+
+    blocksize = args.samplerate * args.block_ms // 1000
+    rng = np.random.default_rng(0)
+    # the callback gets a cffi buffer, a memoryview of the same size is the closest stand-in
+    blocks = [memoryview(rng.integers(-3000, 3000, blocksize, dtype=np.int16)).cast('B')
+              for _ in range(16)]
+    feed = [blocks[i % len(blocks)] for i in range(args.blocks)]
+    capture = Capture(args.samplerate, blocksize=blocksize)
+
+    print(f'{args.blocks} blocks of {blocksize} samples')
+    measure('queue', lambda: queue_path(feed), args.blocks)
+    measure('ring', lambda: ring_path(capture, feed), args.blocks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+'''
+Wall-clock time of editing a long document in one request versus in parallel chunks,
+against the echo backend with an artificial per-token latency.
+'''
+
+import argparse
+import random
+import time
+
+import chunking
+import llm
+
+WORDS = 'the quick brown fox jumps over lazy dog while voice assistant edits text in window'.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=8000, help='document size in characters')
+    parser.add_argument('--token-delay', type=float, default=0.002, metavar='SECONDS')
+    parser.add_argument('--chunk-chars', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = [rng.choice(WORDS) for _ in range(args.size // 5)]
+    sentences = [' '.join(words[i:i + 12]).capitalize() + '.' for i in range(0, len(words), 12)]
+    text = '\n\n'.join(' '.join(sentences[i:i + 6]) for i in range(0, len(sentences), 6))
+    backend = llm.EchoBackend(token_delay=args.token_delay)
+
+    began = time.perf_counter()
+    assert backend.edit(text, 'fix typos') == text
+    print(f'{"single request":<24} {time.perf_counter() - began:>7.2f}s')
+
+    for concurrency in args.concurrency:
+        chunked = chunking.ChunkedBackend(backend, args.chunk_chars, concurrency=concurrency)
+        began = time.perf_counter()
+        assert chunked.edit(text, 'fix typos') == text
+        print(f'{f"{concurrency} parallel chunks":<24} {time.perf_counter() - began:>7.2f}s')
+        began = time.perf_counter()
+        chunked.edit(text, 'fix typos')
+        print(f'{"  again, clean skipped":<24} {time.perf_counter() - began:>7.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+'''
+Per-operation latency of the in-process X11 clipboard versus pyperclip (one xclip/xsel run per call).
+Needs a running X server (or XWayland), e.g. `xvfb-run python bench_clipboard.py` on a headless machine.
+'''
+
+import argparse
+import time
+
+import numpy as np
+
+import clipboard
+
+
+def measure(backend, text, repeat):
+    timings = {'copy': [], 'paste own': [], 'paste other': []}
+    other = clipboard.PyperclipClipboard() if isinstance(backend, clipboard.XClipboard) else None
+    for i in range(repeat):
+        value = f'{text} {i}'
+        began = time.perf_counter()
+        backend.copy(value)
+        timings['copy'].append(time.perf_counter() - began)
+        began = time.perf_counter()
+        assert backend.paste() == value
+        timings['paste own'].append(time.perf_counter() - began)
+        # what reading the input after ctrl+c costs: another client owns the clipboard
+        if other is not None:
+            since = backend.changes()
+            other.copy(value + '!')
+            backend.wait_changed(since)
+        began = time.perf_counter()
+        backend.paste()
+        timings['paste other'].append(time.perf_counter() - began)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--size', type=int, default=1000, help='characters copied each time')
+    args = parser.parse_args()
+
+    text = ('lorem ipsum dolor sit amet ' * (args.size // 27 + 1))[:args.size]
+    backends = [('pyperclip', clipboard.PyperclipClipboard())]
+    try:
+        backends.insert(0, ('x11', clipboard.make_clipboard('x11')))
+    except BaseException as err:
+        print('x11 clipboard unavailable:', err)
+    print(f'{"backend":<10} {"operation":<12} {"median ms":>10} {"p90 ms":>8}')
+    for name, backend in backends:
+        for operation, values in measure(backend, text, args.repeat).items():
+            values = np.array(values) * 1000
+            print(f'{name:<10} {operation:<12} {np.median(values):>10.2f} {np.percentile(values, 90):>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+'''
+Diff-based text application on multi-kilobyte documents: planning time, estimated cost
+and key presses of the full paste versus changed-regions-only, checked on a simulated editor.
+'''
+
+import argparse
+import random
+import time
+
+import textdiff
+from clipboard import MockClipboard
+from fake_keyboard import FakeKeyboard
+
+WORDS = ('the quick brown fox jumps over lazy dog voice assistant edits text in current window '
+         'by giving instructions to a language model and pastes result back into input').split()
+
+
+def document(size, rng):
+    lines, line = [], []
+    while sum(len(l) + 1 for l in lines) < size:
+        line.append(rng.choice(WORDS))
+        if len(' '.join(line)) > 70:
+            lines.append(' '.join(line).capitalize() + '.')
+            line = []
+    return '\n'.join(lines)
+
+
+def mutate(text, edits, rng):
+    words = text.split(' ')
+    for _ in range(edits):
+        i = rng.randrange(len(words))
+        kind = rng.choice(['replace', 'insert', 'delete'])
+        if kind == 'replace':
+            words[i] = rng.choice(WORDS)
+        elif kind == 'insert':
+            words.insert(i, rng.choice(WORDS))
+        elif len(words) > 1:
+            del words[i]
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 8000, 32000])
+    parser.add_argument('--edits', type=int, nargs='+', default=[1, 5, 50])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f'{"size":>6} {"edits":>5} {"plan ms":>8} {"full cost":>9} {"diff cost":>9} '
+          f'{"keys":>6} {"chosen":>6} {"ok":>3}')
+    for size in args.sizes:
+        for edits in args.edits:
+            old = document(size, rng)
+            new = mutate(old, edits, rng)
+            began = time.perf_counter()
+            steps = textdiff.script(old, textdiff.regions(old, new))
+            plan_ms = (time.perf_counter() - began) * 1000
+
+            clipboard = MockClipboard()
+            keyboard = FakeKeyboard(clipboard)
+            keyboard.document = old
+            keyboard.cursor = len(old)
+            chosen = textdiff.apply(old, new, keyboard, clipboard)
+            print(f'{size:>6} {edits:>5} {plan_ms:>8.2f} {textdiff.full_cost(new):>9.0f} '
+                  f'{textdiff.cost(steps):>9.0f} {keyboard.presses:>6} {chosen:>6} '
+                  f'{"yes" if keyboard.document == new else "NO":>3}')
+
+            keyboard.document = old
+            keyboard.cursor = len(old)
+            textdiff.apply(old, new, keyboard, clipboard, strategy='diff')
+            assert keyboard.document == new, 'diff application produced a different text'
+
+
+if __name__ == '__main__':
+    main()
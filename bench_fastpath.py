@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+'''
+Latency of mechanical instructions carried out by the fast path versus sent to an edit backend.
+The echo backend with --token-delay stands in for an LLM, or point it at a real one:
+
+    python bench_fastpath.py --backend http --api-base http://127.0.0.1:8111/v1
+'''
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+import fastpath
+import llm
+
+WORDS = 'the quick brown fox jumps over lazy dog while voice assistant edits text in window'.split()
+INSTRUCTIONS = [
+    'uppercase everything',
+    'make it lowercase',
+    'delete the last sentence',
+    'replace fox with cat',
+    'remove line breaks',
+    'add a period',
+    'make it more formal',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='text size in characters')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', choices=llm.BACKENDS, default='echo')
+    parser.add_argument('--api-base', type=str, metavar='URL')
+    parser.add_argument('--llm-model', type=str, default='gpt-3.5-turbo')
+    parser.add_argument('--edit-engine', type=str, metavar='MODEL')
+    parser.add_argument('--token-delay', type=float, default=0.01, metavar='SECONDS')
+    parser.add_argument('--temperature', type=float, default=0)
+    parser.add_argument('--top-p', type=float, default=1)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--connect-timeout', type=float, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = [rng.choice(WORDS) for _ in range(args.size // 5)]
+    sentences = [' '.join(words[i:i + 12]).capitalize() + '.' for i in range(0, len(words), 12)]
+    text = '\n'.join(' '.join(sentences[i:i + 3]) for i in range(0, len(sentences), 3))
+    backend = llm.make_backend(args)
+    backend.connect()
+    fast = fastpath.FastPath()
+
+    print(f'{"instruction":<28} {"route":<9} {"fast path ms":>12} {"backend ms":>11}')
+    for instruction in INSTRUCTIONS:
+        local, remote = [], []
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            result = fast.apply(text, instruction)
+            local.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            backend.edit(text, instruction)
+            remote.append(time.perf_counter() - began)
+        route = 'fastpath' if result is not None else 'llm'
+        print(f'{instruction:<28} {route:<9} {np.median(local) * 1000:>12.3f} {np.median(remote) * 1000:>11.1f}')
+    print(fast.stats())
+
+
+if __name__ == '__main__':
+    main()
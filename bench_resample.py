@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+'''
+Recognizer CPU time and latency at common device rates, with the capture resampling to the model's rate
+(--resample auto) versus the recognizer getting the device rate (--resample off).
+The WAV recording is first converted to each device rate to stand in for the microphone:
+
+    python bench_resample.py instruction.wav --model vosk-model-en-us-0.22
+'''
+
+import argparse
+import json
+import time
+import wave
+
+import numpy as np
+import vosk
+
+from capture import accept_waveform
+from resample import Resampler, model_rate
+
+
+def run(model, samples, device_rate, rate, block_ms):
+    """Feeds the samples block by block like the capture does, returns the text and the timings."""
+    resampler = Resampler(device_rate, rate) if rate != device_rate else None
+    rec = vosk.KaldiRecognizer(model, rate)
+    blocksize = device_rate * block_ms // 1000
+    blocks = []
+    cpu = time.process_time()
+    for i in range(0, len(samples), blocksize):
+        began = time.perf_counter()
+        block = samples[i:i + blocksize]
+        if resampler is not None:
+            block = resampler.process(block)
+        accept_waveform(rec, memoryview(block).cast('B'))
+        blocks.append(time.perf_counter() - began)
+    began = time.perf_counter()
+    text = json.loads(rec.FinalResult())['text']
+    final = time.perf_counter() - began
+    return text, time.process_time() - cpu, np.array(blocks), final
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('wav', help='mono 16-bit PCM recording of speech')
+    parser.add_argument('-m', '--model', default='model', metavar='MODEL_PATH')
+    parser.add_argument('--rates', type=int, nargs='+', default=[16000, 44100, 48000], help='device rates to try')
+    parser.add_argument('--block-ms', type=int, default=100)
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.model)
+    rate = model_rate(args.model) or 16000
+    with wave.open(args.wav, 'rb') as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            parser.exit(1, f'{args.wav} must be mono 16-bit PCM\n')
+        wav_rate = wf.getframerate()
+        recording = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    duration = len(recording) / wav_rate
+
+    print(f'{duration:.1f}s of audio, model at {rate}Hz')
+    print(f'{"device Hz":>9} {"resample":<8} {"cpu RTF":>8} {"block p50 ms":>12} {"block p90 ms":>12} '
+          f'{"final ms":>8}  text')
+    for device_rate in args.rates:
+        samples = recording
+        if device_rate != wav_rate:
+            samples = Resampler(wav_rate, device_rate).process(recording)
+        modes = [('off', device_rate)] + ([('auto', rate)] if device_rate != rate else [])
+        for mode, recognizer_rate in modes:
+            text, cpu, blocks, final = run(model, samples, device_rate, recognizer_rate, args.block_ms)
+            print(f'{device_rate:>9} {mode:<8} {cpu / duration:>8.3f} {np.median(blocks) * 1000:>12.2f} '
+                  f'{np.percentile(blocks, 90) * 1000:>12.2f} {final * 1000:>8.1f}  {text}')
+
+
+if __name__ == '__main__':
+    main()
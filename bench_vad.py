@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+'''
+End-of-speech to final text latency for different block sizes and VAD silence timeouts.
+Feeds every mono 16-bit WAV in a directory through the recognizer as if it came from the microphone.
+'''
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+import wave
+
+import numpy as np
+import vosk
+
+from vad import EnergyVad, frame_features
+
+
+def end_of_speech(samples, samplerate, threshold):
+    """Time of the last 20ms frame louder than the threshold."""
+    frame = samplerate // 50
+    rms, _ = frame_features(samples.tobytes(), frame)
+    voiced = np.flatnonzero(rms > threshold)
+    return (voiced[-1] + 1) * frame / samplerate if len(voiced) else 0.0
+
+
+def run(rec, samples, samplerate, block_ms, silence, threshold):
+    """Seconds of audio consumed and processing time of the block when the final text appeared."""
+    blocksize = samplerate * block_ms // 1000
+    vad = EnergyVad(samplerate, threshold, silence) if silence > 0 else None
+    rec.Reset()
+    for start in range(0, len(samples), blocksize):
+        data = samples[start:start + blocksize].tobytes()
+        began = time.perf_counter()
+        final = rec.AcceptWaveform(data)
+        if not final and vad is not None and vad.update(data):
+            rec.FinalResult()
+            final = True
+        elapsed = time.perf_counter() - began
+        if final:
+            return (start + blocksize) / samplerate, elapsed, True
+    began = time.perf_counter()
+    rec.FinalResult()
+    return len(samples) / samplerate, time.perf_counter() - began, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('fixtures', help='directory with WAV files')
+    parser.add_argument('-m', '--model', default='model', help='Path to the model')
+    parser.add_argument('--block-ms', type=int, nargs='+', default=[50, 100, 250, 500])
+    parser.add_argument('--silence', type=float, nargs='+', default=[0, 0.3, 0.6, 1.0],
+                        help='VAD trailing silence timeouts, 0 means Kaldi endpointing only')
+    parser.add_argument('--vad-threshold', type=float, default=500)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    model = vosk.Model(args.model)
+    recs = {}
+    results = []
+    for path in sorted(glob.glob(os.path.join(args.fixtures, '*.wav'))):
+        with wave.open(path, 'rb') as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                print('skipping', path, '- must be mono 16-bit PCM')
+                continue
+            samplerate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if samplerate not in recs:
+            recs[samplerate] = vosk.KaldiRecognizer(model, samplerate)
+        eos = end_of_speech(samples, samplerate, args.vad_threshold)
+        for block_ms, silence in itertools.product(args.block_ms, args.silence):
+            final_at, compute, endpointed = run(recs[samplerate], samples, samplerate,
+                                                block_ms, silence, args.vad_threshold)
+            results.append({
+                'file': os.path.basename(path), 'block_ms': block_ms, 'silence': silence,
+                'latency': final_at - eos + compute, 'endpointed': endpointed,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f'{"block ms":>8} {"silence":>8} {"median":>8} {"max":>8} {"endpointed":>10}')
+    for block_ms, silence in itertools.product(args.block_ms, args.silence):
+        rows = [r for r in results if r['block_ms'] == block_ms and r['silence'] == silence]
+        if not rows:
+            continue
+        latencies = np.array([r['latency'] for r in rows])
+        endpointed = sum(r['endpointed'] for r in rows)
+        print(f'{block_ms:>8} {silence:>8} {np.median(latencies):>8.3f} {latencies.max():>8.3f} '
+              f'{endpointed:>6}/{len(rows)}')
+
+
+if __name__ == '__main__':
+    main()
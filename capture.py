@@ -0,0 +1,239 @@
+'''
+Always-warm audio capture: one input stream for the whole app lifetime writing into
+a preallocated ring buffer that recordings read from (pre-roll included) without copying,
+and a pool of reusable recognizers.
+'''
+
+import math
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+import sounddevice as sd
+import vosk
+
+from model_server import RemoteRecognizer
+from resample import Resampler
+
+
+class RecognizerPool:
+    """Keeps KaldiRecognizers around and resets them instead of rebuilding.
+
+    With `server` set the recognizers live in model_server.py and `model` is not used,
+    with `spk_model` set results carry the speaker's x-vector, with `grammar` (a JSON list of phrases)
+    only those phrases are recognized.
+    """
+
+    def __init__(self, model, samplerate, size=2, server=None, spk_model=None, grammar=None):
+        self.model = model
+        self.samplerate = samplerate
+        self.server = server
+        self.spk_model = spk_model
+        self.grammar = grammar
+        self.free = queue.LifoQueue()
+        for _ in range(size):
+            self.free.put(self._create())
+
+    def _create(self):
+        if self.server:
+            return RemoteRecognizer(self.server, self.samplerate, self.grammar)
+        if self.grammar is not None:
+            rec = vosk.KaldiRecognizer(self.model, self.samplerate, self.grammar)
+        else:
+            rec = vosk.KaldiRecognizer(self.model, self.samplerate)
+        if self.spk_model is not None:
+            rec.SetSpkModel(self.spk_model)
+        return rec
+
+    def acquire(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def release(self, rec):
+        rec.Reset()
+        self.free.put(rec)
+
+
+class Session:
+    """Reads the capture's ring buffer from the moment of opening, minus pre-roll."""
+
+    def __init__(self, capture, position):
+        self.capture = capture
+        # absolute index of the next sample to hand out
+        self.position = position
+
+    def get(self, timeout=None):
+        """A memoryview of the next samples, valid until the ring wraps around to them."""
+        return self.capture._read(self, timeout)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Capture:
+    """`samplerate` is the rate of the ring buffer, with another `device_rate` the device is opened at that rate
+    and its blocks resampled on the way in. `blocksize` is in samples of the ring buffer."""
+
+    def __init__(self, samplerate, device=None, blocksize=8000, preroll=0.5, buffer_seconds=10, device_rate=None):
+        self.samplerate = samplerate
+        self.device = device
+        self.blocksize = blocksize
+        self.device_rate = device_rate or samplerate
+        self.resampler = None
+        if self.device_rate != samplerate:
+            self.resampler = Resampler(self.device_rate, samplerate)
+        self.preroll = int(preroll * samplerate)
+        capacity = max(int(buffer_seconds * samplerate), self.preroll + 2 * blocksize)
+        # a whole number of blocks, so blocks of the usual size never wrap around
+        self.ring = np.zeros(math.ceil(capacity / blocksize) * blocksize, dtype=np.int16)
+        self.written = 0
+        self.overflows = 0
+        self.cond = threading.Condition()
+        self.stream = None
+
+    def start(self):
+        self.stream = sd.RawInputStream(samplerate=self.device_rate,
+                                        blocksize=self.blocksize * self.device_rate // self.samplerate,
+                                        device=self.device, dtype='int16', channels=1,
+                                        callback=self._callback)
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def _callback(self, indata, frames, time, status):
+        """This is called (from a separate thread) for each audio block."""
+        if status:
+            if status.input_overflow:
+                self.overflows += 1
+            print(status, file=sys.stderr)
+        samples = np.frombuffer(indata, dtype=np.int16)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        self.write(samples)
+
+    def write(self, samples):
+        capacity = len(self.ring)
+        start = self.written % capacity
+        first = min(len(samples), capacity - start)
+        self.ring[start:start + first] = samples[:first]
+        self.ring[:len(samples) - first] = samples[first:]
+        with self.cond:
+            self.written += len(samples)
+            self.cond.notify_all()
+
+    def session(self):
+        with self.cond:
+            return Session(self, max(0, self.written - self.preroll))
+
+    def _read(self, session, timeout):
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.written > session.position, timeout):
+                raise queue.Empty()
+            written = self.written
+        capacity = len(self.ring)
+        if written - session.position > capacity - self.blocksize:
+            self.overflows += 1
+            print('capture overflow: recognition fell behind, skipping audio', file=sys.stderr)
+            session.position = written - self.blocksize
+        start = session.position % capacity
+        count = min(written - session.position, capacity - start, self.blocksize)
+        session.position += count
+        return memoryview(self.ring[start:start + count]).cast('B')
+
+
+def accept_waveform(rec, data):
+    """rec.AcceptWaveform(data) without copying a memoryview into bytes first."""
+    handle = getattr(rec, '_handle', None)
+    if handle is None or not hasattr(vosk, '_ffi'):
+        return rec.AcceptWaveform(data if handle is None else bytes(data))
+    res = vosk._c.vosk_recognizer_accept_waveform(handle, vosk._ffi.from_buffer(data), len(data))
+    if res < 0:
+        raise Exception('Failed to process waveform')
+    return res
+
+
+class WavSession:
+    """Session that plays a WAV file followed by silence, then gives up."""
+
+    def __init__(self, capture, blocks):
+        self.capture = capture
+        self.blocks = blocks
+        self.next = 0
+        self.started = time.monotonic()
+
+    def get(self, timeout=None):
+        capture = self.capture
+        began = time.perf_counter()
+        if self.next >= len(self.blocks):
+            raise EOFError('no more audio')
+        if capture.realtime:
+            due = self.started + self.next * capture.blocksize / capture.samplerate
+            time.sleep(max(0, due - time.monotonic()))
+        data = self.blocks[self.next]
+        self.next += 1
+        capture.read_time += time.perf_counter() - began
+        return data
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WavCapture:
+    """Stands in for Capture, each session plays the file passed to load().
+    Files at `device_rate` are resampled to `samplerate` like the microphone would be."""
+
+    def __init__(self, samplerate, blocksize, trailing_silence=5.0, realtime=False, device_rate=None):
+        self.samplerate = samplerate
+        self.device_rate = device_rate or samplerate
+        self.blocksize = blocksize
+        self.trailing_silence = trailing_silence
+        self.realtime = realtime
+        self.blocks = []
+        self.read_time = 0.0
+        self.overflows = 0
+
+    def load(self, path):
+        """Returns the duration of the file in seconds."""
+        with wave.open(path, 'rb') as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != self.device_rate:
+                raise ValueError(f'{path} must be mono 16-bit PCM at {self.device_rate}Hz')
+            data = wf.readframes(wf.getnframes())
+        if self.device_rate != self.samplerate:
+            samples = np.frombuffer(data, dtype=np.int16)
+            data = Resampler(self.device_rate, self.samplerate).process(samples).tobytes()
+        step = self.blocksize * 2
+        silence = bytes(step)
+        self.blocks = [data[i:i + step] for i in range(0, len(data), step)]
+        self.blocks += [silence] * math.ceil(self.trailing_silence * self.samplerate / self.blocksize)
+        return len(data) / 2 / self.samplerate
+
+    def session(self):
+        self.read_time = 0.0
+        return WavSession(self, self.blocks)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
@@ -0,0 +1,126 @@
+'''
+Chunked editing of long texts: split on paragraphs (and sentences if needed),
+edit the chunks in parallel with a bit of neighbouring text as context, stitch them back in order.
+'''
+
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from edit_cache import normalize_instruction
+from llm import EditBackend
+
+# instructions that only change text locally, a chunk they left alone stays clean
+LOCAL_INSTRUCTION = re.compile(r'\b(typos?|spelling|grammar|punctuation|capitali[sz]\w*|misspell\w*)\b')
+
+
+def _pieces(text, separator):
+    """Splits keeping each separator attached to the piece before it."""
+    parts = re.split(f'({separator})', text)
+    return [parts[i] + (parts[i + 1] if i + 1 < len(parts) else '') for i in range(0, len(parts), 2)]
+
+
+def split(text, max_chars):
+    """Chunks of at most max_chars (unless a single word is longer) that join back into `text`."""
+    units = []
+    for paragraph in _pieces(text, r'\n\s*\n'):
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in _pieces(paragraph, r'(?<=[.!?])\s+'):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(' ', 0, max_chars) + 1 or max_chars
+                units.append(sentence[:cut])
+                sentence = sentence[cut:]
+            units.append(sentence)
+    chunks = ['']
+    for unit in units:
+        if chunks[-1] and len(chunks[-1]) + len(unit) > max_chars:
+            chunks.append('')
+        chunks[-1] += unit
+    return [chunk for chunk in chunks if chunk]
+
+
+def _context(chunks, i, overlap, outer=None):
+    """Up to `overlap` characters of the neighbouring chunks, the first and last chunk also get
+    the caller's context (text around the whole text, split by [...]) on their outer side."""
+    before = after = ''
+    if overlap > 0:
+        before = ''.join(chunks[:i])[-overlap:]
+        after = ''.join(chunks[i + 1:])[:overlap]
+    outer_before, _, outer_after = (outer or '').partition('[...]')
+    if i == 0:
+        before = outer_before + before
+    if i == len(chunks) - 1:
+        after += outer_after
+    if not before and not after:
+        return None
+    return f'{before}[...]{after}'
+
+
+class ChunkedBackend(EditBackend):
+    """Edits long texts chunk by chunk, short ones go to the wrapped backend as they are."""
+
+    def __init__(self, backend, max_chars=2000, overlap=200, concurrency=4):
+        self.backend = backend
+        self.name = backend.name
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='chunk')
+        # chunks that a local instruction already returned unchanged
+        self.clean = set()
+        self.lock = threading.Lock()
+
+    def connect(self):
+        self.backend.connect()
+
+    def _clean_key(self, chunk, instruction):
+        raw = normalize_instruction(instruction) + '\0' + chunk.strip()
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _edit_chunk(self, chunk, instruction, context):
+        local = LOCAL_INSTRUCTION.search(normalize_instruction(instruction))
+        key = self._clean_key(chunk, instruction)
+        if local and key in self.clean:
+            return chunk
+        # models drop surrounding whitespace, keep the original one so chunks join up
+        body = chunk.strip()
+        if not body:
+            return chunk
+        lead = chunk[:len(chunk) - len(chunk.lstrip())]
+        trail = chunk[len(chunk.rstrip()):]
+        result = self.backend.edit(body, instruction, context).strip()
+        if local and result == body:
+            with self.lock:
+                self.clean.add(key)
+        return lead + result + trail
+
+    def _submit(self, text, instruction, context):
+        chunks = split(text, self.max_chars)
+        print(f'editing {len(chunks)} chunks')
+        return [self.executor.submit(self._edit_chunk, chunk, instruction, _context(chunks, i, self.overlap, context))
+                for i, chunk in enumerate(chunks)]
+
+    def edit(self, text, instruction, context=None):
+        if len(text) <= self.max_chars:
+            return self.backend.edit(text, instruction, context)
+        return ''.join(future.result() for future in self._submit(text, instruction, context))
+
+    def stream(self, text, instruction, context=None):
+        if len(text) <= self.max_chars:
+            yield from self.backend.stream(text, instruction, context)
+            return
+        futures = self._submit(text, instruction, context)
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def wrap(backend, args):
+    if args.chunk_chars <= 0:
+        return backend
+    return ChunkedBackend(backend, args.chunk_chars, args.chunk_overlap, args.chunk_concurrency)
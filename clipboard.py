@@ -0,0 +1,259 @@
+'''
+Clipboard access without a subprocess per call: an X11 selection owner living in the process
+(XWayland covers Wayland sessions), pyperclip as the fallback and an in-memory mock for benchmarks.
+
+Besides copy and paste every backend can wait for what blind sleeps used to guess:
+the focused app taking the clipboard after ctrl+c, and it reading our text after ctrl+v.
+'''
+
+import os
+import threading
+import time
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
+try:
+    import Xlib.display
+    import Xlib.protocol.event
+    import Xlib.threaded  # makes one display connection usable from several threads
+    from Xlib import X, Xatom
+    from Xlib.ext import xfixes
+except ImportError:
+    Xlib = None
+
+BACKENDS = ['auto', 'x11', 'pyperclip', 'mock']
+TIMEOUT = 0.5
+
+
+class Clipboard:
+    def paste(self):
+        raise NotImplementedError
+
+    def copy(self, text):
+        raise NotImplementedError
+
+    def changes(self):
+        """A token to pass to wait_changed."""
+        raise NotImplementedError
+
+    def wait_changed(self, since, timeout=TIMEOUT):
+        """Waits until another app took the clipboard after changes() returned `since`."""
+        raise NotImplementedError
+
+    def wait_pasted(self, timeout=TIMEOUT):
+        """Waits until the text given to copy() was read by someone."""
+        raise NotImplementedError
+
+
+class XClipboard(Clipboard):
+    """Owns the CLIPBOARD selection from a hidden window and learns about other owners via XFixes."""
+
+    def __init__(self):
+        self.display = Xlib.display.Display()
+        if not self.display.has_extension('XFIXES'):
+            raise BaseException('the X server has no XFIXES extension')
+        self.display.xfixes_query_version()
+        self.window = self.display.screen().root.create_window(
+            0, 0, 1, 1, 0, X.CopyFromParent, event_mask=X.PropertyChangeMask)
+        atom = self.display.intern_atom
+        self.CLIPBOARD = atom('CLIPBOARD')
+        self.TARGETS = atom('TARGETS')
+        self.UTF8_STRING = atom('UTF8_STRING')
+        self.TEXT = atom('TEXT')
+        self.INCR = atom('INCR')
+        self.PROPERTY = atom('VOICE_ASSISTANT_CLIPBOARD')
+        self.display.xfixes_select_selection_input(
+            self.window, self.CLIPBOARD, xfixes.XFixesSetSelectionOwnerNotifyMask)
+        self.display.flush()
+        self.cond = threading.Condition()
+        # the text while we own the clipboard
+        self.text = None
+        self.pending = False
+        self.changed = 0
+        self.reply = None
+        self.incr = None
+        threading.Thread(target=self._events, name='clipboard', daemon=True).start()
+
+    def paste(self):
+        with self.cond:
+            if self.text is not None:
+                return self.text
+            self.reply = None
+        self.window.convert_selection(self.CLIPBOARD, self.UTF8_STRING, self.PROPERTY, X.CurrentTime)
+        self.display.flush()
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.reply is not None, TIMEOUT) or self.reply == X.NONE:
+                return ''
+        prop = self.window.get_full_property(self.PROPERTY, X.AnyPropertyType)
+        if prop is None:
+            return ''
+        if prop.property_type != self.INCR:
+            self.window.delete_property(self.PROPERTY)
+            self.display.flush()
+            return bytes(prop.value).decode('utf-8', 'replace')
+        # large texts come in chunks, each one announced by a property change
+        with self.cond:
+            self.incr = []
+        self.window.delete_property(self.PROPERTY)
+        self.display.flush()
+        with self.cond:
+            self.cond.wait_for(lambda: self.incr is None or self.incr[-1:] == [b''], 10 * TIMEOUT)
+            chunks, self.incr = self.incr or [], None
+        return b''.join(chunks).decode('utf-8', 'replace')
+
+    def copy(self, text):
+        with self.cond:
+            self.text = text
+            self.pending = True
+        self.window.set_selection_owner(self.CLIPBOARD, X.CurrentTime)
+        self.display.flush()
+
+    def changes(self):
+        return self.changed
+
+    def wait_changed(self, since, timeout=TIMEOUT):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.changed != since, timeout)
+
+    def wait_pasted(self, timeout=TIMEOUT):
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.pending, timeout)
+
+    def _events(self):
+        owner_notify = self.display.extension_event.SetSelectionOwnerNotify
+        while True:
+            event = self.display.next_event()
+            if event.type == X.SelectionRequest:
+                self._serve(event)
+            elif event.type == X.SelectionClear:
+                with self.cond:
+                    self.text = None
+                    self.pending = False
+            elif event.type == X.SelectionNotify:
+                with self.cond:
+                    self.reply = event.property
+                    self.cond.notify_all()
+            elif event.type == X.PropertyNotify:
+                if event.atom == self.PROPERTY and event.state == X.PropertyNewValue and self.incr is not None:
+                    prop = self.window.get_full_property(self.PROPERTY, X.AnyPropertyType)
+                    self.window.delete_property(self.PROPERTY)
+                    self.display.flush()
+                    with self.cond:
+                        if self.incr is not None:
+                            self.incr.append(bytes(prop.value) if prop is not None else b'')
+                        self.cond.notify_all()
+            elif (event.type, getattr(event, 'sub_code', None)) == owner_notify:
+                owner = getattr(event.owner, 'id', event.owner)
+                if owner != self.window.id:
+                    with self.cond:
+                        self.changed += 1
+                        self.cond.notify_all()
+
+    def _serve(self, event):
+        with self.cond:
+            text = self.text
+        # obsolete clients leave the property empty and expect the target to be used
+        prop = event.property or event.target
+        served = False
+        if text is None or event.selection != self.CLIPBOARD:
+            prop = X.NONE
+        elif event.target == self.TARGETS:
+            targets = [self.TARGETS, self.UTF8_STRING, self.TEXT, Xatom.STRING]
+            event.requestor.change_property(prop, Xatom.ATOM, 32, targets)
+        elif event.target in (self.UTF8_STRING, self.TEXT, Xatom.STRING):
+            encoding = 'latin-1' if event.target == Xatom.STRING else 'utf-8'
+            event.requestor.change_property(prop, event.target, 8, text.encode(encoding, 'replace'))
+            served = True
+        else:
+            prop = X.NONE
+        notify = Xlib.protocol.event.SelectionNotify(
+            time=event.time, requestor=event.requestor, selection=event.selection,
+            target=event.target, property=prop)
+        event.requestor.send_event(notify)
+        self.display.flush()
+        if served:
+            with self.cond:
+                self.pending = False
+                self.cond.notify_all()
+
+
+class PyperclipClipboard(Clipboard):
+    """pyperclip can neither tell when the clipboard changed nor when it was read, so it polls and sleeps."""
+
+    def __init__(self):
+        if pyperclip is None:
+            raise BaseException('the pyperclip clipboard needs pyperclip, `pip install pyperclip`')
+
+    def paste(self):
+        return pyperclip.paste()
+
+    def copy(self, text):
+        pyperclip.copy(text)
+
+    def changes(self):
+        return pyperclip.paste()
+
+    def wait_changed(self, since, timeout=TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if pyperclip.paste() != since:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def wait_pasted(self, timeout=TIMEOUT):
+        time.sleep(min(0.1, timeout))
+        return True
+
+
+class MockClipboard(Clipboard):
+    """In-memory clipboard, app_copy() and app_paste() stand in for the focused app."""
+
+    def __init__(self):
+        self.text = ''
+        self.changed = 0
+        self.pending = False
+
+    def paste(self):
+        return self.text
+
+    def copy(self, text):
+        self.text = text
+        self.pending = True
+
+    def changes(self):
+        return self.changed
+
+    def wait_changed(self, since, timeout=TIMEOUT):
+        return self.changed != since
+
+    def wait_pasted(self, timeout=TIMEOUT):
+        return not self.pending
+
+    def app_copy(self, text):
+        self.text = text
+        self.changed += 1
+
+    def app_paste(self):
+        self.pending = False
+        return self.text
+
+
+def make_clipboard(name='auto'):
+    if name == 'mock':
+        return MockClipboard()
+    if name == 'pyperclip':
+        return PyperclipClipboard()
+    if name == 'x11' or (Xlib is not None and os.environ.get('DISPLAY')):
+        if Xlib is None:
+            raise BaseException('the x11 clipboard needs python3-xlib, `pip install python-xlib`')
+        try:
+            return XClipboard()
+        except Exception as err:
+            if name == 'x11':
+                raise
+            print('X11 clipboard unavailable, using pyperclip:', err)
+    return PyperclipClipboard()
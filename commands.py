@@ -0,0 +1,69 @@
+'''
+Voice commands: a grammar recognizer limited to control words and a list of frequent instructions
+runs next to the free-form one and ends the recording as soon as one of them is clearly said.
+'''
+
+import json
+import re
+
+CONTROL = ['enter', 'cancel', 'undo', 'repeat']
+
+
+def normalize(phrase):
+    return ' '.join(re.sub(r'[^\w\s\']', ' ', phrase.lower()).split())
+
+
+def load_instructions(path):
+    """One instruction per line, # starts a comment."""
+    if not path:
+        return []
+    with open(path) as f:
+        lines = [normalize(line.split('#', 1)[0]) for line in f]
+    return [line for line in lines if line]
+
+
+def control(text):
+    """The control word if the whole text is one."""
+    text = normalize(text or '')
+    return text if text in CONTROL else None
+
+
+class CommandSpotter:
+    """Decides when the grammar recognizer heard a whole command.
+
+    A final grammar result is enough, a partial one has to stay the same for `stable_blocks` blocks
+    and agree with the free-form partial, so "undo the last change" is not cut short at "undo".
+    """
+
+    def __init__(self, instructions=(), stable_blocks=2):
+        self.phrases = list(dict.fromkeys(CONTROL + [normalize(i) for i in instructions]))
+        self.stable_blocks = stable_blocks
+        self.reset()
+
+    def grammar(self):
+        # [unk] absorbs everything else instead of forcing it into the closest command
+        return json.dumps(self.phrases + ['[unk]'])
+
+    def reset(self):
+        self.last = None
+        self.stable = 0
+
+    def update(self, text, final, free_partial):
+        """The command phrase once it was recognized, None until then."""
+        text = normalize(text) if '[unk]' not in text else None
+        if text not in self.phrases:
+            self.reset()
+            return None
+        if final:
+            return text
+        self.stable = self.stable + 1 if text == self.last else 0
+        self.last = text
+        if self.stable >= self.stable_blocks and normalize(free_partial) == text:
+            return text
+        return None
+
+
+def make_spotter(args):
+    if not args.commands:
+        return None
+    return CommandSpotter(load_instructions(args.instructions), args.command_blocks)
@@ -0,0 +1,442 @@
+'''
+Voice assistant service: one model, one audio stream and one keyboard hook
+shared by actions (edit, dictate, ...) that are bound to their own hotkeys.
+'''
+
+import argparse
+import collections
+import os
+import sounddevice as sd
+import vosk
+import keyboard
+import json
+import queue
+import re
+import threading
+import time
+import tracing
+import jobs
+from osd import Osd
+from capture import Capture, RecognizerPool, accept_waveform
+from model_server import DEFAULT_SOCKET
+from vad import EnergyVad
+import speaker
+import commands
+import recordings
+import clipboard
+import cues
+import resample
+# import pyautogui # requires `xhost + local:` to work for root
+
+# action name -> Action subclass, filled by @register in the action modules
+ACTIONS = {}
+
+def copy(clipboard):
+    """Text of the focused input, read once the app has actually put it on the clipboard."""
+    # pyautogui.hotkey('ctrl', 'a')
+    # pyautogui.hotkey('ctrl', 'c')
+    since = clipboard.changes()
+    keyboard.send('ctrl+a')
+    keyboard.send('ctrl+c')
+    if not clipboard.wait_changed(since):
+        print('clipboard did not change after ctrl+c, empty input?')
+    return clipboard.paste()
+
+
+class Stt:
+    def __init__(self):
+        self.ready = threading.Event()
+        self.load_error = None
+        self.model = None
+        self.recognizers = None
+        self.command_recognizers = None
+
+    def _int_or_str(self, text):
+        """Helper function for argument parsing."""
+        try:
+            return int(text)
+        except ValueError:
+            return text
+
+    def init(self, argv=None, capture=None, add_arguments=(), background=False):
+        """Parses argv (sys.argv by default), `capture` replaces the microphone, e.g. with WavCapture,
+        `add_arguments` are functions that add the options of the actions to the parser.
+        With `background` the model loads in a thread and `ready` is set once it has."""
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument(
+            '-l', '--list-devices', action='store_true',
+            help='show list of audio devices and exit')
+        args, remaining = parser.parse_known_args(argv)
+        if args.list_devices:
+            print(sd.query_devices())
+            parser.exit(0)
+        parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+            parents=[parser])
+        parser.add_argument(
+            '--dump-dir', type=str, metavar='DIR',
+            help='directory to store a WAV file of every recording in, with index.jsonl of transcripts')
+        parser.add_argument(
+            '--dump-format', choices=['wav', 'flac'], default='wav',
+            help='format of the stored recordings, flac needs the soundfile package')
+        parser.add_argument(
+            '--dump-max-files', type=int, default=0, metavar='N',
+            help='keep only the latest N recordings, 0 keeps all')
+        parser.add_argument(
+            '--dump-max-mb', type=float, default=0, metavar='MB',
+            help='keep only the latest recordings that fit in MB megabytes, 0 for no limit')
+        parser.add_argument(
+            '-m', '--model', type=str, metavar='MODEL_PATH',
+            help='Path to the model')
+        parser.add_argument(
+            '--model-server', nargs='?', const=DEFAULT_SOCKET, metavar='SOCKET',
+            help='use the model loaded by model_server.py instead of loading one')
+        parser.add_argument(
+            '--commands', action='store_true',
+            help='recognize enter, cancel, undo, repeat and --instructions with a fast grammar recognizer')
+        parser.add_argument(
+            '--instructions', type=str, metavar='FILENAME',
+            help='frequent instructions, one per line, to recognize as commands')
+        parser.add_argument(
+            '--command-blocks', type=int, default=2, metavar='BLOCKS',
+            help='blocks a partial command has to stay the same for to be taken')
+        parser.add_argument(
+            '--speakers', type=str, metavar='PROFILES',
+            help='only accept recordings of speakers enrolled in this file with `speaker.py enroll`')
+        parser.add_argument(
+            '--spk-model', type=str, default='model-spk', metavar='MODEL_PATH',
+            help='Path to the speaker model used with --speakers')
+        parser.add_argument(
+            '--spk-threshold', type=float, default=0.5,
+            help='largest cosine distance to an enrolled speaker that is accepted')
+        parser.add_argument(
+            '-d', '--device', type=self._int_or_str,
+            help='input device (numeric ID or substring)')
+        parser.add_argument(
+            '-r', '--samplerate', type=int, help='sampling rate')
+        parser.add_argument(
+            '--resample', choices=['auto', 'off'], default='auto',
+            help="auto resamples the microphone to the model's rate before recognition, off feeds the device rate")
+        parser.add_argument(
+            '--block-ms', type=int, default=100, metavar='MS',
+            help='length of audio blocks fed to the recognizer')
+        parser.add_argument(
+            '--vad-silence', type=float, default=0, metavar='SECONDS',
+            help='end the utterance after this much trailing silence, 0 to rely on the recognizer only')
+        parser.add_argument(
+            '--vad-threshold', type=float, default=500,
+            help='RMS level of int16 samples that counts as speech')
+        parser.add_argument(
+            '--preroll', type=float, default=0.5, metavar='SECONDS',
+            help='audio from before the hotkey press to prepend to each recording')
+        for add in add_arguments:
+            add(parser)
+        args = parser.parse_args(remaining)
+
+        if args.model is None:
+            args.model = "model"
+        if not args.model_server and not os.path.exists(args.model):
+            print ("Please download a model for your language from https://alphacephei.com/vosk/models")
+            print ("and unpack as 'model' in the current folder.")
+            parser.exit(0)
+        if args.samplerate is None:
+            device_info = sd.query_devices(args.device, 'input')
+            # soundfile expects an int, sounddevice provides a float:
+            args.samplerate = int(device_info['default_samplerate'])
+        resample.resolve(args)
+
+        if args.speakers and args.model_server:
+            parser.error('--speakers needs a model loaded in the app, not --model-server')
+
+        self.args = args
+        self.dumps = recordings.make_writer(args)
+        self.speakers = speaker.make_gate(args)
+        self.spotter = commands.make_spotter(args)
+        if capture is None:
+            blocksize = args.samplerate * args.block_ms // 1000
+            capture = Capture(args.samplerate, args.device, blocksize=blocksize, preroll=args.preroll,
+                              device_rate=args.device_rate)
+            capture.start()
+        elif capture.samplerate != args.samplerate:
+            # files at the device rate are resampled like the microphone
+            capture.samplerate = args.samplerate
+        self.capture = capture
+        if background:
+            threading.Thread(target=self._load, name='model-load', daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        """Loads the model, recordings started in the meantime buffer their audio until it is ready."""
+        args = self.args
+        began = time.perf_counter()
+        try:
+            model = None if args.model_server else vosk.Model(args.model)
+            spk_model = vosk.SpkModel(args.spk_model) if args.speakers else None
+            self.model = model
+            self.recognizers = RecognizerPool(model, args.samplerate, server=args.model_server, spk_model=spk_model)
+            if self.spotter is not None:
+                self.command_recognizers = RecognizerPool(model, args.samplerate, size=1, server=args.model_server,
+                                                          grammar=self.spotter.grammar())
+        except Exception as err:
+            self.load_error = err
+            print('Could not load the model', err)
+        else:
+            print('initialized', args.samplerate, args.device, f'(device at {args.device_rate})',
+                  f'in {time.perf_counter() - began:.1f}s')
+        self.ready.set()
+
+    def record_once(self, on_stable=None, trace=None, cancel=None, on_partial=None):
+        """on_stable is called with the partial text once it stays the same for --speculate-blocks blocks,
+        on_partial with every partial text, setting the `cancel` event stops the recording."""
+        trace = trace or tracing.Trace()
+        recording = self.dumps.open() if self.dumps is not None else None
+        with self.capture.session() as session:
+            trace.mark('stream_open')
+            text = self._recognize(session, recording, on_stable, trace, cancel, on_partial)
+        if recording is not None:
+            recording.close(text)
+        return text
+
+    def _accept_speaker(self, rec, result, trace):
+        """Whether the recording passes the --speakers check, `result` is the final recognizer result if there is one."""
+        if self.speakers is None:
+            return True
+        if result is None:
+            result = json.loads(rec.FinalResult())
+        accepted, name, distance = self.speakers.check(result)
+        print('Speaker:', name, distance, 'accepted' if accepted else 'rejected')
+        trace.tag('speaker', name if accepted else None)
+        return accepted
+
+    def _spot_command(self, rec, data, partial):
+        if accept_waveform(rec, data):
+            return self.spotter.update(json.loads(rec.Result())['text'], True, partial)
+        return self.spotter.update(json.loads(rec.PartialResult())['partial'], False, partial)
+
+    def _buffer_until_ready(self, session, cancel):
+        """Audio recorded while the model is still loading, None if the recording was canceled meanwhile."""
+        blocks = collections.deque()
+        if not self.ready.is_set():
+            print('model is still loading, buffering audio')
+        while not self.ready.is_set():
+            if keyboard.is_pressed('esc') or (cancel is not None and cancel.is_set()):
+                return None
+            try:
+                # copied, the ring buffer would overwrite them if the model takes long
+                blocks.append(bytes(session.get(timeout=0.1)))
+            except queue.Empty:
+                pass
+        if self.load_error is not None:
+            print('Could not load the model', self.load_error)
+            return None
+        return blocks
+
+    def _recognize(self, session, recording, on_stable, trace, cancel, on_partial):
+        try:
+            early = self._buffer_until_ready(session, cancel)
+        except BaseException as err:
+            print('Could not record', err)
+            return None
+        if early is None:
+            return None
+        rec = self.recognizers.acquire()
+        command_rec = None
+        if self.spotter is not None:
+            command_rec = self.command_recognizers.acquire()
+            self.spotter.reset()
+        overflows = self.capture.overflows
+        vad = None
+        if self.args.vad_silence > 0:
+            vad = EnergyVad(self.args.samplerate, self.args.vad_threshold, self.args.vad_silence)
+        last_partial = None
+        stable_blocks = 0
+
+        try:
+            while True:
+                if keyboard.is_pressed('esc') or (cancel is not None and cancel.is_set()):
+                    return
+                data = early.popleft() if early else session.get()
+                if recording is not None:
+                    recording.write(data)
+                if accept_waveform(rec, data):
+                    res = json.loads(rec.Result())
+                    r = res['text']
+                    print('Text:', r)
+                    trace.mark('final_text')
+                    return r if self._accept_speaker(rec, res, trace) else None
+                else:
+                    res = rec.PartialResult()
+                    r = json.loads(res)['partial']
+                    print('Partial:', r)
+                    if r:
+                        trace.mark('first_partial')
+                    if on_partial is not None:
+                        on_partial(r)
+                    words = r.split(' ')
+                    if command_rec is not None:
+                        command = self._spot_command(command_rec, data, r)
+                        if command is not None:
+                            print('Command:', command)
+                            trace.mark('final_text')
+                            trace.tag('command', command)
+                            return command if self._accept_speaker(rec, None, trace) else None
+                    if words[-1] == 'enter':
+                        trace.mark('final_text')
+                        return re.sub(' enter\s*$', '', r) if self._accept_speaker(rec, None, trace) else None
+                    if vad is not None and vad.update(data):
+                        res = json.loads(rec.FinalResult())
+                        r = res['text']
+                        print('Text:', r)
+                        trace.mark('final_text')
+                        return r if self._accept_speaker(rec, res, trace) else None
+                    stable_blocks = stable_blocks + 1 if r and r == last_partial else 0
+                    last_partial = r
+                    if on_stable is not None and stable_blocks == self.args.speculate_blocks:
+                        on_stable(r)
+        except BaseException as err:
+            print('Could not record', err)
+            return None
+        finally:
+            self.recognizers.release(rec)
+            if command_rec is not None:
+                self.command_recognizers.release(command_rec)
+            trace.tag('overflows', self.capture.overflows - overflows)
+
+
+def register(cls):
+    """Class decorator that makes an action available to the service."""
+    ACTIONS[cls.name] = cls
+    return cls
+
+
+class Action:
+    """What a hotkey does. Subclasses set `name` and the default `hotkey` and implement run()."""
+
+    name = None
+    hotkey = None
+
+    def __init__(self, service):
+        self.service = service
+        self.stt = service.stt
+        self.osd = service.osd
+        self.clipboard = service.clipboard
+        self.cues = service.cues
+
+    @staticmethod
+    def add_arguments(parser):
+        pass
+
+    def setup(self, args):
+        """Called once the arguments are parsed, the model may still be loading."""
+
+    def run(self, job):
+        raise NotImplementedError
+
+
+class Service:
+    def __init__(self):
+        self.stt = Stt()
+        self.osd = Osd()
+        self.actions = {}
+        self.clipboard = None
+        self.cues = None
+        self.jobs = jobs.JobRunner(self._run)
+        # boot stage -> seconds since start(), for profile_startup.py
+        self.started = None
+        self.stages = []
+        self.booted = threading.Event()
+
+    @staticmethod
+    def _add_arguments(parser):
+        parser.add_argument(
+            '--actions', nargs='+', choices=list(ACTIONS), metavar='ACTION',
+            help=f'actions to bind to hotkeys, out of {", ".join(ACTIONS)}')
+        parser.add_argument(
+            '--hotkey', action='append', default=[], metavar='ACTION=KEY',
+            help='bind an action to another key, e.g. dictate="right ctrl"')
+        parser.add_argument(
+            '--clipboard', choices=clipboard.BACKENDS, default='auto',
+            help='x11 keeps the clipboard in the process (needs python-xlib), pyperclip runs xclip/xsel for each access')
+        parser.add_argument(
+            '--no-cues', action='store_true', help='no sound cues')
+        parser.add_argument(
+            '--cue-device', type=Stt._int_or_str, help='output device for the sound cues (number or name substring)')
+        parser.add_argument(
+            '--cue-volume', type=float, default=0.3, help='volume of the sound cues, 0 to 1')
+
+    def init(self, argv=None, capture=None, actions=None, background=False, hotkeys=None):
+        """Sets up the actions and loads the model, `actions` are the ones enabled unless --actions says otherwise,
+        `hotkeys` (action -> key) rebind them unless --hotkey does. With `background` the model loads in a thread,
+        see Stt.init."""
+        self.stt.init(argv, capture, [self._add_arguments] + [cls.add_arguments for cls in ACTIONS.values()],
+                      background)
+        self._mark('audio')
+        args = self.stt.args
+        self.clipboard = clipboard.make_clipboard(args.clipboard)
+        self.cues = cues.make_player(args)
+        hotkeys = {**(hotkeys or {}), **dict(hotkey.split('=', 1) for hotkey in args.hotkey)}
+        for name in args.actions or actions or list(ACTIONS):
+            action = ACTIONS[name](self)
+            action.hotkey = hotkeys.get(name, action.hotkey)
+            action.setup(args)
+            self.actions[name] = action
+        self._mark('actions')
+
+    def start(self, argv=None, actions=None, hotkeys=None):
+        """Staged boot: audio capture and hotkeys first, the display and the model in the background.
+        Hotkey presses before the model is loaded start recording right away."""
+        self.started = time.perf_counter()
+        self.init(argv, actions=actions, background=True, hotkeys=hotkeys)
+        self.bind()
+        self._mark('hotkeys')
+        self.osd.start()
+        threading.Thread(target=self._wait_stages, daemon=True).start()
+
+    def _mark(self, stage):
+        if self.started is not None:
+            self.stages.append((stage, time.perf_counter() - self.started))
+
+    def _wait_stages(self):
+        def wait_display():
+            self.osd.ready.wait()
+            self._mark('display' if self.osd.error is None else 'display failed')
+        # marked as each one gets ready, the model usually comes last but need not
+        display = threading.Thread(target=wait_display, daemon=True)
+        display.start()
+        self.stt.ready.wait()
+        self._mark('model')
+        display.join()
+        self.stages.sort(key=lambda stage: stage[1])
+        print('ready:', ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in self.stages))
+        self.booted.set()
+
+    def submit(self, name):
+        """Runs in the keyboard hook thread, so only queues the job."""
+        return self.jobs.submit(name)
+
+    def _run(self, job):
+        self.actions[job.action].run(job)
+
+    def bind(self):
+        for name, action in self.actions.items():
+            print(f'{action.hotkey}: {name}')
+            keyboard.on_release_key(action.hotkey, lambda evt, name=name: self.submit(name))
+        keyboard.on_press_key('esc', lambda evt: self.jobs.cancel())
+        self.cues.play('ready') # sound hint that app started
+
+    def listen(self):
+        try:
+            keyboard.wait()
+        except KeyboardInterrupt:
+            print('\nDone')
+
+
+service = Service()
+
+
+def main(actions=None, hotkeys=None):
+    keyboard.send('esc') # error fast if no root
+    service.start(actions=actions, hotkeys=hotkeys)
+    service.listen()
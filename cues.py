@@ -0,0 +1,109 @@
+'''
+Sound cues: short tones synthesized once at startup and mixed into one output stream
+that stays open for the whole app, so playing a cue is just queueing a buffer.
+'''
+
+import collections
+import queue
+import sys
+import time
+
+import numpy as np
+import sounddevice as sd
+
+# cue -> notes as (frequency Hz, seconds), played one after another
+CUES = {
+    'ready': [(523, 0.07), (659, 0.07), (784, 0.1)],
+    'listen': [(660, 0.06), (880, 0.08)],
+    'heard': [(880, 0.08)],
+    'done': [(880, 0.06), (1320, 0.1)],
+    'cancel': [(440, 0.08), (330, 0.12)],
+}
+FADE = 0.005
+
+
+def tone(notes, samplerate, volume):
+    """The notes as float32 samples, each faded in and out so it does not click."""
+    parts = []
+    fade = int(FADE * samplerate)
+    for frequency, seconds in notes:
+        t = np.arange(int(seconds * samplerate)) / samplerate
+        wave = np.sin(2 * np.pi * frequency * t)
+        envelope = np.ones_like(wave)
+        ramp = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, fade))
+        envelope[:fade] = ramp
+        envelope[-fade:] = ramp[::-1]
+        parts.append(wave * envelope)
+    return (volume * np.concatenate(parts)).astype(np.float32)
+
+
+class CuePlayer:
+    """Plays cues without a thread or a device open per cue. Does nothing if it was not started."""
+
+    def __init__(self, samplerate=48000, device=None, volume=0.3, blocksize=256):
+        self.samplerate = samplerate
+        self.device = device
+        self.blocksize = blocksize
+        self.buffers = {name: tone(notes, samplerate, volume) for name, notes in CUES.items()}
+        self.incoming = queue.SimpleQueue()
+        self.playing = []
+        self.stream = None
+        # seconds from play() to the cue's first sample reaching the DAC, of the latest cues
+        self.latencies = collections.deque(maxlen=1000)
+
+    def start(self):
+        try:
+            self.stream = sd.OutputStream(samplerate=self.samplerate, blocksize=self.blocksize, device=self.device,
+                                          channels=1, dtype='float32', latency='low', callback=self._callback)
+            self.stream.start()
+        except Exception as err:
+            self.stream = None
+            print('Could not open the output stream, no sound cues:', err, file=sys.stderr)
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def play(self, name):
+        if self.stream is not None:
+            self.incoming.put((self.buffers[name], self.stream.time))
+
+    def _callback(self, outdata, frames, time, status):
+        """This is called (from a separate thread) for each output block."""
+        out = outdata[:, 0]
+        out.fill(0)
+        while True:
+            try:
+                buffer, requested = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            self.latencies.append(time.outputBufferDacTime - requested)
+            self.playing.append([buffer, 0])
+        for cue in self.playing:
+            buffer, position = cue
+            count = min(frames, len(buffer) - position)
+            out[:count] += buffer[position:position + count]
+            cue[1] += count
+        self.playing = [cue for cue in self.playing if cue[1] < len(cue[0])]
+        if len(self.playing) > 1:
+            np.clip(out, -1, 1, out=out)
+
+
+def make_player(args):
+    player = CuePlayer(device=args.cue_device, volume=args.cue_volume)
+    if not args.no_cues:
+        player.start()
+    return player
+
+
+if __name__ == '__main__':
+    player = CuePlayer()
+    player.start()
+    for name in CUES:
+        print(name)
+        player.play(name)
+        time.sleep(0.6)
+    print('latency', ', '.join(f'{latency * 1000:.1f}ms' for latency in player.latencies))
+    player.stop()
@@ -0,0 +1,54 @@
+'''
+The dictate action: dictate text and it will be pasted at cursor position.
+Say 'enter' at the end to avoid pauses.
+'''
+
+import keyboard
+import jobs
+import commands
+import core
+
+
+@core.register
+class DictateAction(core.Action):
+    name = 'dictate'
+    hotkey = 'right ctrl'
+
+    def __init__(self, service):
+        super().__init__(service)
+        self.last_text = None
+
+    def run(self, job):
+        job.set_state(jobs.RECORDING)
+        self.cues.play('listen')
+
+        text = self.stt.record_once(cancel=job.cancel_event)
+        command = commands.control(text) if self.stt.spotter is not None else None
+        if command == 'repeat':
+            text = self.last_text
+        elif command is not None:
+            if command != 'cancel':
+                job.set_state(jobs.PASTING)
+                keyboard.send('enter' if command == 'enter' else 'ctrl+z')
+                self.cues.play('done')
+                job.set_state(jobs.DONE)
+                return
+            text = None
+        if text is None:
+            print('CANCELED')
+            self.cues.play('cancel')
+            raise jobs.Canceled()
+        self.last_text = text
+
+        print('=' * 60)
+        print('-' * 40, 'Text:')
+        print(text)
+
+        job.set_state(jobs.PASTING)
+        old_clipboard = self.clipboard.paste()
+        self.clipboard.copy(f'{text}')
+        keyboard.send('ctrl+v')
+        self.clipboard.wait_pasted()
+        self.clipboard.copy(old_clipboard)
+        self.cues.play('done')
+        job.set_state(jobs.DONE)
@@ -0,0 +1,127 @@
+'''
+On-disk LRU cache of edit results keyed on the text, the instruction and model parameters.
+'''
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from llm import EditBackend
+
+
+def normalize_instruction(instruction):
+    """'Fix grammar.' and 'fix  grammar' are the same request."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', instruction.lower()).split())
+
+
+class EditCache:
+    def __init__(self, path, max_entries=1000, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS edits '
+                        '(key TEXT PRIMARY KEY, result TEXT, created REAL, used REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS edits_used ON edits (used)')
+        self.db.commit()
+
+    def key(self, text, instruction, params):
+        raw = json.dumps([text, normalize_instruction(instruction), params])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute('SELECT result, created FROM edits WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self.db.execute('DELETE FROM edits WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.db.execute('UPDATE edits SET used = ? WHERE key = ?', (now, key))
+            self.db.commit()
+        return None if row is None else row[0]
+
+    def put(self, key, result):
+        now = time.time()
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO edits VALUES (?, ?, ?, ?)', (key, result, now, now))
+            self.db.execute('DELETE FROM edits WHERE created < ?', (now - self.ttl,))
+            self.db.execute('DELETE FROM edits WHERE key IN '
+                            '(SELECT key FROM edits ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                            (self.max_entries,))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute('DELETE FROM edits')
+            self.db.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return f'cache hits {self.hits}, misses {self.misses}, hit rate {rate:.0%}'
+
+
+class CachedBackend(EditBackend):
+    """Serves repeated edits from the cache, passes the rest to the wrapped backend."""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = f'{backend.name}+cache'
+
+    def _key(self, text, instruction, context, stream):
+        backend = self.backend
+        # only blocking edits go to the engine, streamed ones always to the chat model
+        engine = None if stream else getattr(backend, 'engine', None)
+        params = [backend.name, engine, getattr(backend, 'model', None),
+                  getattr(backend, 'temperature', None), getattr(backend, 'top_p', None), context]
+        return self.cache.key(text, instruction, params)
+
+    def connect(self):
+        self.backend.connect()
+
+    def edit(self, text, instruction, context=None):
+        key = self._key(text, instruction, context, False)
+        result = self.cache.get(key)
+        print(self.cache.stats())
+        if result is None:
+            result = self.backend.edit(text, instruction, context)
+            self.cache.put(key, result)
+        return result
+
+    def stream(self, text, instruction, context=None):
+        key = self._key(text, instruction, context, True)
+        result = self.cache.get(key)
+        print(self.cache.stats())
+        if result is not None:
+            yield result
+            return
+        pieces = []
+        for piece in self.backend.stream(text, instruction, context):
+            pieces.append(piece)
+            yield piece
+        self.cache.put(key, ''.join(pieces))
+
+
+def wrap(backend, args):
+    """Puts the cache in front of the backend if the arguments allow it."""
+    if args.no_cache:
+        return backend
+    used = getattr(backend, 'temperature', 0) == 0 or args.cache_nondeterministic
+    # the database file is only created when there is something to do with it
+    if not used and not args.clear_cache:
+        return backend
+    cache = EditCache(args.cache_file, max_entries=args.cache_size, ttl=args.cache_ttl)
+    if args.clear_cache:
+        cache.clear()
+        print('cache cleared')
+    return CachedBackend(backend, cache) if used else backend
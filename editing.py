@@ -0,0 +1,293 @@
+'''
+The edit action: the focused input's text is edited by an LLM following a spoken instruction.
+'''
+
+import keyboard
+import requests
+import threading
+import time
+import llm
+import edit_cache
+import chunking
+from speculate import Speculator
+import tracing
+import jobs
+import commands
+import scope
+import fastpath
+import core
+
+
+@core.register
+class EditAction(core.Action):
+    """Copies the focused input, records an instruction, has the backend edit the text and pastes the result."""
+
+    name = 'edit'
+    hotkey = 'alt gr'
+
+    def __init__(self, service):
+        super().__init__(service)
+        self.backend = None
+        self.speculator = None
+        self.tracer = tracing.Tracer()
+        self.trace = None
+        self.last_instruction = None
+        self.fastpath = None
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument(
+            '--backend', choices=llm.BACKENDS, default='openai',
+            help='what edits the text: OpenAI, any OpenAI compatible server or a local echo')
+        parser.add_argument(
+            '--api-base', type=str, metavar='URL',
+            help='API of the backend, e.g. http://127.0.0.1:8111/v1 for fake_llm_server.py')
+        parser.add_argument(
+            '--llm-model', type=str, default='gpt-3.5-turbo',
+            help='chat model used for streaming and by the http backend')
+        parser.add_argument(
+            '--edit-engine', type=str, metavar='MODEL',
+            help='send blocking edits to the legacy OpenAI edits endpoint with this model, e.g. text-davinci-edit-001')
+        parser.add_argument(
+            '--temperature', type=float, default=0.7)
+        parser.add_argument(
+            '--top-p', type=float, default=0.9)
+        parser.add_argument(
+            '--timeout', type=float, default=30, metavar='SECONDS',
+            help='how long to wait for the backend to respond')
+        parser.add_argument(
+            '--connect-timeout', type=float, default=5, metavar='SECONDS')
+        parser.add_argument(
+            '--token-delay', type=float, default=0, metavar='SECONDS',
+            help='artificial per-token latency of the echo backend')
+        parser.add_argument(
+            '--cache-file', type=str, default='edit_cache.sqlite', metavar='PATH',
+            help='where to keep results of previous edits')
+        parser.add_argument(
+            '--cache-size', type=int, default=1000, metavar='ENTRIES')
+        parser.add_argument(
+            '--cache-ttl', type=float, default=7 * 24 * 3600, metavar='SECONDS')
+        parser.add_argument(
+            '--cache-nondeterministic', action='store_true',
+            help='cache edits even if temperature is not 0')
+        parser.add_argument(
+            '--no-cache', action='store_true')
+        parser.add_argument(
+            '--clear-cache', action='store_true',
+            help='forget all cached edits on startup')
+        parser.add_argument(
+            '--speculate-blocks', type=int, default=0, metavar='BLOCKS',
+            help='send the edit early once the partial transcript is unchanged for this many blocks, 0 to disable')
+        parser.add_argument(
+            '--trace-file', type=str, default='traces.jsonl', metavar='PATH',
+            help='JSONL log of pipeline timestamps, one record per edit, empty to disable')
+        parser.add_argument(
+            '--trace-summary-every', type=int, default=0, metavar='EDITS',
+            help='print latency histograms every this many edits')
+        parser.add_argument(
+            '--metrics-port', type=int, metavar='PORT',
+            help='serve latency histograms in Prometheus text format on http://127.0.0.1:PORT/metrics')
+        parser.add_argument(
+            '--chunk-chars', type=int, default=0, metavar='CHARS',
+            help='edit texts longer than this in parallel chunks, 0 to always send the whole text')
+        parser.add_argument(
+            '--chunk-overlap', type=int, default=200, metavar='CHARS',
+            help='neighbouring text sent along with each chunk as context')
+        parser.add_argument(
+            '--chunk-concurrency', type=int, default=4)
+        parser.add_argument(
+            '--apply', choices=['auto', 'full', 'diff'], default='auto',
+            help='paste the whole result, only change the regions that differ, or pick the cheaper one')
+        parser.add_argument(
+            '--scope', choices=scope.SCOPES, default='off',
+            help='edit only the selection or, without one, the paragraph or lines around the cursor')
+        parser.add_argument(
+            '--scope-lines', type=int, default=3, metavar='LINES',
+            help='lines to each side of the cursor with --scope lines')
+        parser.add_argument(
+            '--scope-context', type=int, default=200, metavar='CHARS',
+            help='text around the scope sent along as context')
+        parser.add_argument(
+            '--token-budget', type=int, default=0, metavar='TOKENS',
+            help='trim the scope and its context to fit this many tokens, or refuse a longer text, 0 for no limit')
+        parser.add_argument(
+            '--no-fastpath', action='store_true',
+            help='send mechanical instructions like "uppercase everything" to the backend too')
+        parser.add_argument(
+            '--no-stream', action='store_true',
+            help='wait for the whole edit instead of streaming it')
+
+    def setup(self, args):
+        self.backend = chunking.wrap(edit_cache.wrap(llm.make_backend(args), args), args)
+        threading.Thread(target=self.backend.connect, daemon=True).start()
+        self.fastpath = fastpath.make_fastpath(args)
+        if args.speculate_blocks > 0:
+            self.speculator = Speculator(self.backend)
+        self.tracer = tracing.Tracer(args.trace_file, summary_every=args.trace_summary_every)
+        if args.metrics_port:
+            self.tracer.serve(args.metrics_port)
+
+    def run(self, job=None):
+        job = job or jobs.Job()
+        self.trace = trace = tracing.Trace(start=job.created)
+        old_clipboard = self.clipboard.paste()
+        try:
+            self._edit(job, old_clipboard)
+        except jobs.Canceled:
+            if self.speculator is not None:
+                self.speculator.cancel()
+            print('CANCELED')
+            self.osd.hide()
+            self.clipboard.copy(old_clipboard)
+            self.cues.play('cancel')
+            self.tracer.finish(trace, 'canceled')
+            job.set_state(jobs.CANCELED)
+        except Exception:
+            self.osd.hide()
+            self.clipboard.copy(old_clipboard)
+            self.cues.play('cancel')
+            self.tracer.finish(trace, 'failed')
+            raise
+
+    def _edit(self, job, old_clipboard):
+        trace = self.trace
+        job.set_state(jobs.RECORDING)
+        args = self.stt.args
+        cursor = None
+        if args.scope == 'off':
+            region = scope.Region(core.copy(self.clipboard))
+        else:
+            region, cursor = scope.grab(keyboard, self.clipboard, args.scope, args.scope_lines, args.scope_context)
+        text = region.text
+        self.cues.play('listen')
+        print('=' * 60)
+        print('-' * 40, 'Edit text:')
+        print(f'{text[0:60]}...')
+        # return
+        self.osd.show(f'[{text[0:60]}...]')
+        self.osd.status('listening')
+
+        on_stable = None
+        if self.speculator is not None:
+            on_stable = lambda partial: self._speculate(text, partial, region.context)
+        instruction = self.stt.record_once(on_stable, trace, job.cancel_event, self.osd.partial)
+        if instruction is None:
+            raise jobs.Canceled()
+        command = commands.control(instruction) if self.stt.spotter is not None else None
+        if command in ('enter', 'cancel'):
+            raise jobs.Canceled()
+        if command == 'undo':
+            job.set_state(jobs.PASTING)
+            self.osd.hide()
+            keyboard.send('ctrl+z')
+            trace.tag('apply', 'undo')
+            trace.mark('paste_done')
+            self._finish(job, old_clipboard)
+            return
+        if command == 'repeat':
+            if self.last_instruction is None:
+                raise jobs.Canceled()
+            instruction = self.last_instruction
+        self.last_instruction = instruction
+        # done locally, so neither the budget nor the backend matter
+        local = self.fastpath.apply(region.text, instruction) if self.fastpath is not None else None
+        if local is None and not region.fit(args.token_budget, instruction, cursor):
+            tokens = scope.estimate_tokens(region.text) + scope.estimate_tokens(instruction)
+            print(f'about {tokens} tokens with the instruction, over the budget of {args.token_budget}')
+            raise jobs.Canceled()
+        text, context = region.text, region.context
+        trace.tag('route', 'llm' if local is None else 'fastpath')
+        if local is None:
+            trace.tag('tokens', sum(scope.estimate_tokens(part) for part in (text, context or '', instruction)))
+
+        job.set_state(jobs.REQUESTING)
+        self.cues.play('heard')
+        print('=' * 60)
+        print('-' * 40, 'Edit text:')
+        print(f'{text[0:60]}...')
+        print('-' * 40, 'Instruction:')
+        print(instruction)
+        self.osd.show(f'{instruction} [{text[0:60]}...]')
+
+        if local is not None:
+            rule, choice = local
+            print(f'Fast path: {rule}, {self.fastpath.stats()}')
+            trace.tag('rule', rule)
+            # the result is there, so the paste stage is timed like after a response
+            trace.mark('response_complete')
+            if self.speculator is not None:
+                self.speculator.cancel()
+        else:
+            speculative = None
+            if self.speculator is not None:
+                speculative = self.speculator.resolve(text, instruction, context)
+            trace.tag('speculative', speculative is not None)
+            if speculative is not None:
+                trace.mark('llm_request')
+                choice = self._wait_speculative(job, speculative, text, instruction, context)
+                trace.mark('response_complete')
+            else:
+                choice = self._request_edit(job, text, instruction, context)
+        job.check()
+        self.osd.hide()
+
+        print(choice)
+        print()
+
+        job.set_state(jobs.PASTING)
+        strategy = scope.apply(region, choice, keyboard, self.clipboard, args.apply)
+        print('applied:', strategy)
+        trace.tag('apply', strategy)
+        trace.mark('paste_done')
+        self._finish(job, old_clipboard)
+
+    def _finish(self, job, old_clipboard):
+        # scope.apply already waited for the app to read what it pasted
+        self.clipboard.copy(old_clipboard)
+        self.trace.mark('clipboard_restored')
+        self.cues.play('done')
+        self.tracer.finish(self.trace, 'done')
+        job.set_state(jobs.DONE)
+
+    def _speculate(self, text, partial, context):
+        # a fast path instruction never waits for the backend
+        if self.fastpath is None or self.fastpath.match(partial) is None:
+            self.speculator.start(text, partial, context)
+
+    def _progress(self, what):
+        """Ticks while waiting for the backend, shows how long it has been."""
+        started = time.monotonic()
+        return lambda: self.osd.status(f'{what} {time.monotonic() - started:.1f}s')
+
+    def _request_edit(self, job, text, instruction, context=None):
+        backend = self.backend
+        trace = self.trace
+        trace.tag('backend', backend.name)
+        trace.mark('llm_request')
+        progress = self._progress(f'waiting for {backend.name}')
+        if self.stt.args.no_stream:
+            choice = job.call(backend.edit, text, instruction, context, on_tick=progress)
+            trace.mark('first_byte')
+            trace.mark('response_complete')
+            return choice
+        choice = ''
+        try:
+            for token in job.iterate(backend.stream(text, instruction, context), on_tick=progress):
+                trace.mark('first_byte')
+                choice += token
+                self.osd.preview(choice)
+        except requests.RequestException as err:
+            print('Streaming failed, falling back to a blocking request:', err)
+            choice = job.call(backend.edit, text, instruction, context, on_tick=progress)
+        trace.mark('response_complete')
+        stages = trace.stages()
+        print(f'{backend.name} first byte after {stages.get("llm_first_byte", 0):.2f}s, '
+              f'edit took {stages["llm"]:.2f}s')
+        return choice
+
+    def _wait_speculative(self, job, future, text, instruction, context=None):
+        try:
+            return job.wait(future, on_tick=self._progress('waiting for the early request'))
+        except requests.RequestException as err:
+            print('Speculative request failed, sending it again:', err)
+            return self._request_edit(job, text, instruction, context)
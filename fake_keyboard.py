@@ -0,0 +1,107 @@
+'''
+Stand-in for the keyboard module and the focused app in benchmarks and tests: a plain text editor
+that reacts to the keys the app sends, copying and pasting through a clipboard.MockClipboard.
+'''
+
+
+class FakeKeyboard:
+    """Plain text editor with one document, a cursor and a selection."""
+
+    def __init__(self, clipboard):
+        self.clipboard = clipboard
+        self.document = ''
+        self.cursor = 0
+        self.anchor = None
+        self.presses = 0
+
+    def _line_start(self, pos):
+        return self.document.rfind('\n', 0, pos) + 1
+
+    def _line_end(self, pos):
+        end = self.document.find('\n', pos)
+        return len(self.document) if end == -1 else end
+
+    def _selection(self):
+        if self.anchor is None:
+            return self.cursor, self.cursor
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor)
+
+    def _replace_selection(self, text):
+        start, end = self._selection()
+        self.document = self.document[:start] + text + self.document[end:]
+        self.cursor = start + len(text)
+        self.anchor = None
+
+    def _move_line(self, step):
+        col = self.cursor - self._line_start(self.cursor)
+        if step < 0:
+            if self._line_start(self.cursor) == 0:
+                return
+            start = self._line_start(self._line_start(self.cursor) - 1)
+        else:
+            end = self._line_end(self.cursor)
+            if end == len(self.document):
+                return
+            start = end + 1
+        self.cursor = min(start + col, self._line_end(start))
+
+    def send(self, keys):
+        self.presses += 1
+        doc = self.document
+        if keys == 'ctrl+a':
+            self.anchor, self.cursor = 0, len(doc)
+            return
+        if keys == 'ctrl+c':
+            start, end = self._selection()
+            self.clipboard.app_copy(doc[start:end])
+            return
+        if keys == 'ctrl+v':
+            self._replace_selection(self.clipboard.app_paste())
+            return
+        if keys == 'delete':
+            if self.anchor is None:
+                self.anchor = min(self.cursor + 1, len(doc))
+            self._replace_selection('')
+            return
+        if keys == 'shift+right':
+            if self.anchor is None:
+                self.anchor = self.cursor
+            self.cursor = min(self.cursor + 1, len(doc))
+            return
+        if keys in ('ctrl+shift+home', 'ctrl+shift+end'):
+            if self.anchor is None:
+                self.anchor = self.cursor
+            self.cursor = 0 if keys == 'ctrl+shift+home' else len(doc)
+            return
+        if keys in ('left', 'right') and self.anchor is not None:
+            # arrows collapse a selection at its start or end
+            start, end = self._selection()
+            self.cursor, self.anchor = (start if keys == 'left' else end), None
+            return
+        self.anchor = None
+        if keys == 'ctrl+home':
+            self.cursor = 0
+        elif keys == 'ctrl+end':
+            self.cursor = len(doc)
+        elif keys == 'home':
+            self.cursor = self._line_start(self.cursor)
+        elif keys == 'end':
+            self.cursor = self._line_end(self.cursor)
+        elif keys == 'right':
+            self.cursor = min(self.cursor + 1, len(doc))
+        elif keys == 'left':
+            self.cursor = max(self.cursor - 1, 0)
+        elif keys == 'up':
+            self._move_line(-1)
+        elif keys == 'down':
+            self._move_line(1)
+
+    def write(self, text):
+        self.presses += len(text)
+        self._replace_selection(text)
+
+    def is_pressed(self, key):
+        return False
+
+    def call_later(self, fn, args=(), delay=0):
+        fn(*args)
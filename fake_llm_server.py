@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+'''
+Local stand-in for the OpenAI API: echoes the input text back word by word.
+Point the app at it with `--api-base http://127.0.0.1:8111/v1`.
+'''
+
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+token_delay = 0.05
+
+
+def input_text(body):
+    if 'input' in body:
+        return body['input']
+    content = body['messages'][-1]['content']
+    return content.split('Text:\n', 1)[-1]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        text = input_text(body)
+        if body.get('stream'):
+            self._stream(text)
+            return
+        time.sleep(token_delay * len(text.split()))
+        if 'messages' in body:
+            self._json({'object': 'chat.completion',
+                        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}}]})
+        else:
+            self._json({'object': 'edit', 'choices': [{'text': text, 'index': 0}]})
+
+    def do_GET(self):
+        self._json({'object': 'list', 'data': []})
+
+    def _json(self, obj):
+        data = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, text):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for token in re.findall(r'\S+\s*|\s+', text):
+            time.sleep(token_delay)
+            self._chunk({'choices': [{'index': 0, 'delta': {'content': token}}]})
+        self._chunk('[DONE]')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _chunk(self, obj):
+        payload = obj if isinstance(obj, str) else json.dumps(obj)
+        data = f'data: {payload}\n\n'.encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+
+def main():
+    global token_delay
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8111)
+    parser.add_argument('--token-delay', type=float, default=token_delay, metavar='SECONDS')
+    args = parser.parse_args()
+    token_delay = args.token_delay
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), Handler)
+    print('listening on', server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\nDone')
+
+
+if __name__ == '__main__':
+    main()
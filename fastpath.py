@@ -0,0 +1,140 @@
+'''
+Fast path for mechanical instructions ("uppercase everything", "delete the last sentence",
+"replace foo with bar", "remove line breaks", "add a period"): they are matched against the transcript
+and carried out on the copied text right away, everything else goes to the edit backend.
+'''
+
+import re
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+TEXT = r'(?: (?:it|this|that|everything|all|all of it|the text|the whole text))?'
+# "replace the adjectives with synonyms" or "replace it with ..." describe an edit, they are not literal text
+NOT_LITERAL = {'it', 'this', 'that', 'these', 'those', 'them', 'the', 'a', 'an', 'all', 'every', 'each', 'any',
+               'some', 'everything', 'my', 'your', 'his', 'her', 'its', 'our', 'their'}
+
+
+def _trailing(fn):
+    """Applies fn to the text without its trailing whitespace, which is kept."""
+    def apply(text):
+        body = text.rstrip()
+        return fn(body) + text[len(body):]
+    return apply
+
+
+def _sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence]
+
+
+@_trailing
+def _delete_last_sentence(text):
+    sentences = _sentences(text)
+    return text[:len(text) - len(sentences[-1])].rstrip() if sentences else text
+
+
+@_trailing
+def _delete_first_sentence(text):
+    sentences = _sentences(text)
+    return text[len(sentences[0]):].lstrip() if sentences else text
+
+
+@_trailing
+def _delete_last_word(text):
+    return re.sub(r'\s*\S+$', '', text)
+
+
+@_trailing
+def _delete_last_line(text):
+    return text.rsplit('\n', 1)[0] if '\n' in text else ''
+
+
+def _ending(mark):
+    @_trailing
+    def add(text):
+        return re.sub(r'[.!?,;:]*$', mark, text, count=1) if text else text
+    return add
+
+
+def _replace(old, new):
+    if old.split()[0].lower() in NOT_LITERAL:
+        return None
+
+    def replace(text):
+        pattern = re.compile(rf'(?<!\w){re.escape(old)}(?!\w)', re.IGNORECASE)
+        # None falls through to the backend
+        return pattern.sub(lambda m: new, text) if pattern.search(text) else None
+    return replace
+
+
+def _clean(instruction):
+    """Like commands.normalize but keeps the case, which matters for the replacement in "replace X with Y"."""
+    return ' '.join(re.sub(r'[^\w\s\']', ' ', instruction or '').split())
+
+
+# (name, pattern matching the whole instruction in any case, fn(match) -> fn(text) -> edited text or None,
+#  the first fn returns None for matches the rule turns out not to handle)
+RULES = [
+    ('uppercase', rf'(?:make|convert|change|turn)?{TEXT} ?(?:to |in(?:to)? )?(?:upper ?case|all caps|capital letters|capitals){TEXT}',
+     lambda m: str.upper),
+    ('lowercase', rf'(?:make|convert|change|turn)?{TEXT} ?(?:to |in(?:to)? )?lower ?case{TEXT}',
+     lambda m: str.lower),
+    ('title case', rf'(?:make|convert|change|turn)?{TEXT} ?(?:to |in(?:to)? )?title ?case{TEXT}',
+     lambda m: lambda text: re.sub(r"[A-Za-z]+('[A-Za-z]+)?", lambda w: w.group(0).capitalize(), text)),
+    ('delete last sentence', r'(?:delete|remove|drop) the last sentence',
+     lambda m: _delete_last_sentence),
+    ('delete first sentence', r'(?:delete|remove|drop) the first sentence',
+     lambda m: _delete_first_sentence),
+    ('delete last word', r'(?:delete|remove|drop) the last word',
+     lambda m: _delete_last_word),
+    ('delete last line', r'(?:delete|remove|drop) the last line',
+     lambda m: _delete_last_line),
+    ('remove line breaks', r'(?:remove|delete) (?:all )?(?:the )?(?:line breaks|new ?lines)|join (?:all )?(?:the )?lines',
+     lambda m: lambda text: re.sub(r'[ \t]*\n\s*', ' ', text.strip()) + text[len(text.rstrip()):]),
+    ('remove extra spaces', r'(?:remove|delete) (?:the )?(?:extra|double|duplicate) spaces',
+     lambda m: lambda text: re.sub(r'(?<=\S)[ \t]{2,}', ' ', text)),
+    ('add period', r'add (?:a )?(?:period|full stop|dot)(?: at the end)?',
+     lambda m: _ending('.')),
+    ('add question mark', r'add (?:a )?question mark(?: at the end)?',
+     lambda m: _ending('?')),
+    ('add exclamation mark', r'add (?:an )?exclamation (?:mark|point)(?: at the end)?',
+     lambda m: _ending('!')),
+    ('replace', r'replace (?P<old>.+?) with (?P<new>.+)',
+     lambda m: _replace(m.group('old'), m.group('new'))),
+]
+
+
+class FastPath:
+    def __init__(self, rules=RULES):
+        self.rules = [(name, re.compile(pattern, re.IGNORECASE), make) for name, pattern, make in rules]
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, instruction):
+        """(rule name, fn(text)) for an instruction it can carry out, None otherwise."""
+        instruction = _clean(instruction)
+        for name, pattern, make in self.rules:
+            m = pattern.fullmatch(instruction)
+            fn = make(m) if m else None
+            if fn is not None:
+                return name, fn
+        return None
+
+    def apply(self, text, instruction):
+        """(rule name, edited text), None if the instruction needs the backend."""
+        found = self.match(instruction)
+        edited = found[1](text) if found is not None else None
+        if edited is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return found[0], edited
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return f'fast path {self.hits}, backend {self.misses}, fast path rate {rate:.0%}'
+
+
+def make_fastpath(args):
+    if args.no_fastpath:
+        return None
+    return FastPath()
@@ -0,0 +1,156 @@
+'''
+Jobs of all actions run one at a time on a worker thread so the keyboard hook returns immediately.
+
+A job goes queued -> recording -> requesting -> pasting -> done,
+and can end up canceled or failed from any of these states.
+'''
+
+import concurrent.futures
+import itertools
+import queue
+import threading
+import time
+
+QUEUED = 'queued'
+RECORDING = 'recording'
+REQUESTING = 'requesting'
+PASTING = 'pasting'
+DONE = 'done'
+CANCELED = 'canceled'
+FAILED = 'failed'
+POLL_INTERVAL = 0.05
+
+_ids = itertools.count(1)
+
+
+class Canceled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, action=None):
+        self.id = next(_ids)
+        self.action = action
+        self.created = time.monotonic()
+        self.state = QUEUED
+        self.cancel_event = threading.Event()
+
+    def set_state(self, state):
+        self.state = state
+        print(f'job {self.id}: {state}')
+
+    @property
+    def canceled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check(self):
+        """Raises Canceled if the job was canceled, call it wherever the pipeline can stop."""
+        if self.canceled:
+            raise Canceled()
+
+    def wait(self, future, on_tick=None):
+        """Result of the future, or Canceled as soon as the job is canceled."""
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except concurrent.futures.TimeoutError:
+                self.check()
+                if on_tick is not None:
+                    on_tick()
+
+    def call(self, fn, *args, on_tick=None):
+        """Runs a blocking call (e.g. an HTTP request) that the job can walk away from.
+        Each call gets its own thread, so calls abandoned by canceled jobs never hold up later ones."""
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as err:
+                future.set_exception(err)
+
+        threading.Thread(target=run, name=f'job-{self.id}-call', daemon=True).start()
+        return self.wait(future, on_tick)
+
+    def iterate(self, iterable, on_tick=None):
+        """Iterates in a helper thread, so a canceled job stops waiting for the next item."""
+        items = queue.Queue()
+        end = object()
+
+        def pump():
+            iterator = iter(iterable)
+            try:
+                for item in iterator:
+                    if self.canceled:
+                        break
+                    items.put(item)
+            except Exception as err:
+                items.put(err)
+            finally:
+                # closing a generator closes its HTTP response
+                getattr(iterator, 'close', lambda: None)()
+                items.put(end)
+
+        threading.Thread(target=pump, daemon=True).start()
+        while True:
+            try:
+                item = items.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                self.check()
+                if on_tick is not None:
+                    on_tick()
+                continue
+            if item is end:
+                self.check()
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class JobRunner:
+    def __init__(self, run, maxsize=2):
+        self.run = run
+        self.q = queue.Queue(maxsize)
+        self.current = None
+        # jobs submitted before this were canceled, queued ones included
+        self.canceled_at = float('-inf')
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, action=None):
+        """Queues a job and returns it right away, None if the queue is full."""
+        job = Job(action)
+        try:
+            self.q.put_nowait(job)
+        except queue.Full:
+            print('too many jobs queued, ignoring')
+            return None
+        job.set_state(QUEUED)
+        return job
+
+    def cancel(self):
+        """Cancels the running job and the queued ones, esc stops everything that was asked for."""
+        self.canceled_at = time.monotonic()
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def _work(self):
+        while True:
+            job = self.q.get()
+            self.current = job
+            if job.created <= self.canceled_at:
+                job.cancel()
+            try:
+                job.check()
+                self.run(job)
+            except Canceled:
+                job.set_state(CANCELED)
+            except Exception as err:
+                print(f'{job.action or "Job"} failed:', repr(err))
+                job.set_state(FAILED)
+            finally:
+                self.current = None
@@ -0,0 +1,152 @@
+'''
+Backends for the language model that edits the copied text.
+'''
+
+import json
+import os
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OPENAI_API_BASE = 'https://api.openai.com/v1'
+SYSTEM_PROMPT = 'Apply the instruction to the text. Reply with the edited text only.'
+
+
+class EditBackend:
+    """Turns the copied text and a spoken instruction into the edited text."""
+    name = 'base'
+
+    def connect(self):
+        """Called once at startup so the first edit does not pay for setup."""
+
+    def edit(self, text, instruction, context=None):
+        """`context` is surrounding text the model may look at but must not return."""
+        raise NotImplementedError
+
+    def stream(self, text, instruction, context=None):
+        """Yields pieces of the edited text, backends that can't stream yield it whole."""
+        yield self.edit(text, instruction, context)
+
+
+class HttpBackend(EditBackend):
+    """Any OpenAI compatible chat completions server, over one keep-alive session."""
+    name = 'http'
+
+    def __init__(self, api_base, api_key='', model='gpt-3.5-turbo', temperature=0.7, top_p=0.9,
+                 timeout=30, connect_timeout=5):
+        self.api_base = api_base.rstrip('/')
+        self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.timeout = (connect_timeout, timeout)
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def connect(self):
+        """Opens the connection (and TLS) so the first edit reuses it."""
+        start = time.monotonic()
+        try:
+            self.session.get(f'{self.api_base}/models', timeout=self.timeout).close()
+        except requests.RequestException as err:
+            print('Could not pre-connect to', self.api_base, err)
+            return
+        print(f'connected to {self.api_base} in {time.monotonic() - start:.2f}s')
+
+    def _chat(self, text, instruction, context, stream):
+        prompt = f'Instruction: {instruction}\n\n'
+        if context:
+            prompt += f'Context, do not include it in the reply:\n{context}\n\n'
+        return {
+            'model': self.model,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': f'{prompt}Text:\n{text}'},
+            ],
+            'temperature': self.temperature,
+            'top_p': self.top_p,
+            'stream': stream,
+        }
+
+    def _post(self, path, body, stream=False):
+        response = self.session.post(f'{self.api_base}{path}', json=body, stream=stream,
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def edit(self, text, instruction, context=None):
+        response = self._post('/chat/completions', self._chat(text, instruction, context, False))
+        return response.json()['choices'][0]['message']['content']
+
+    def stream(self, text, instruction, context=None):
+        response = self._post('/chat/completions', self._chat(text, instruction, context, True), stream=True)
+        with response:
+            for line in response.iter_lines():
+                if not line.startswith(b'data:'):
+                    continue
+                payload = line[len(b'data:'):].strip()
+                if payload == b'[DONE]':
+                    return
+                delta = json.loads(payload)['choices'][0].get('delta', {})
+                if delta.get('content'):
+                    yield delta['content']
+
+
+class OpenAiBackend(HttpBackend):
+    """OpenAI itself: chat completions like any compatible server, with an `engine` blocking edits
+    go to the legacy edits endpoint instead (which runs another model and has no place for context)."""
+    name = 'openai'
+
+    def __init__(self, api_key, api_base=OPENAI_API_BASE, engine=None, **kwargs):
+        super().__init__(api_base, api_key, **kwargs)
+        self.engine = engine
+
+    def edit(self, text, instruction, context=None):
+        if self.engine is None:
+            return super().edit(text, instruction, context)
+        response = self._post('/edits', {
+            'model': self.engine,
+            'input': text,
+            'instruction': instruction,
+            'temperature': self.temperature,
+            'top_p': self.top_p,
+        })
+        return response.json()['choices'][0]['text']
+
+
+class EchoBackend(EditBackend):
+    """In-process stand-in that returns the text unchanged, optionally token by token."""
+    name = 'echo'
+
+    def __init__(self, token_delay=0.0):
+        self.token_delay = token_delay
+
+    def edit(self, text, instruction, context=None):
+        return ''.join(self.stream(text, instruction))
+
+    def stream(self, text, instruction, context=None):
+        for token in re.findall(r'\S+\s*|\s+', text):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+
+BACKENDS = ['openai', 'http', 'echo']
+
+
+def make_backend(args):
+    if args.backend == 'echo':
+        return EchoBackend(token_delay=args.token_delay)
+    params = dict(temperature=args.temperature, top_p=args.top_p,
+                  timeout=args.timeout, connect_timeout=args.connect_timeout)
+    api_key = os.getenv('OPENAI_API_KEY', '')
+    if args.backend == 'http':
+        return HttpBackend(args.api_base or OPENAI_API_BASE, api_key, model=args.llm_model, **params)
+    if api_key == '':
+        raise BaseException('no OPENAI_API_KEY')
+    return OpenAiBackend(api_key, args.api_base or OPENAI_API_BASE, engine=args.edit_engine, model=args.llm_model,
+                         **params)
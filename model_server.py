@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+'''
+Recognizer daemon: loads the vosk model once and serves recognizers to several apps over a Unix socket.
+
+Protocol, one connection per recognizer:
+- client sends a JSON line {"samplerate": 16000, "grammar": null}
+- then messages of 1 byte type and 4 bytes big-endian length followed by the payload:
+  b'A' audio, b'R' reset, b'F' final result, b'P' partial result, b'S' result
+- server answers each message with a JSON line {"final": bool, "result": "<vosk json>"}
+'''
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import vosk
+
+DEFAULT_SOCKET = '/tmp/voice-assistant-model.sock'
+HEADER = struct.Struct('>cI')
+
+
+def read_exact(f, n):
+    data = f.read(n)
+    if len(data) < n:
+        raise EOFError()
+    return data
+
+
+class Models:
+    """The loaded model, optionally a small one until the large one is ready."""
+
+    def __init__(self, path, small_path=None):
+        self.path = path
+        self.ready = threading.Event()
+        if small_path:
+            self.model = self._load(small_path)
+            threading.Thread(target=self._swap, daemon=True).start()
+        else:
+            self.model = self._load(path)
+            self.ready.set()
+
+    def _load(self, path):
+        start = time.monotonic()
+        model = vosk.Model(path)
+        print(f'loaded {path} in {time.monotonic() - start:.1f}s')
+        return model
+
+    def _swap(self):
+        # connected recognizers switch over on their next reset
+        self.model = self._load(self.path)
+        self.ready.set()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.config = json.loads(self.rfile.readline())
+        rec = self._create()
+        try:
+            while True:
+                kind, length = HEADER.unpack(read_exact(self.rfile, HEADER.size))
+                payload = read_exact(self.rfile, length) if length else b''
+                final = False
+                if kind == b'A':
+                    final = bool(rec.AcceptWaveform(payload))
+                    result = rec.Result() if final else rec.PartialResult()
+                elif kind == b'F':
+                    result = rec.FinalResult()
+                elif kind == b'P':
+                    result = rec.PartialResult()
+                elif kind == b'S':
+                    result = rec.Result()
+                else:
+                    # a reset is a good moment to move to the large model once it is loaded
+                    rec = rec if self.model is self.server.models.model else self._create()
+                    rec.Reset()
+                    result = '{}'
+                self.wfile.write(json.dumps({'final': final, 'result': result}).encode() + b'\n')
+        except (EOFError, ConnectionError):
+            pass
+
+    def _create(self):
+        self.model = self.server.models.model
+        if self.config.get('grammar'):
+            return vosk.KaldiRecognizer(self.model, self.config['samplerate'], self.config['grammar'])
+        return vosk.KaldiRecognizer(self.model, self.config['samplerate'])
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RemoteRecognizer:
+    """KaldiRecognizer look-alike that talks to the daemon."""
+
+    def __init__(self, socket_path, samplerate, grammar=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.f = self.sock.makefile('rwb')
+        self.f.write(json.dumps({'samplerate': samplerate, 'grammar': grammar}).encode() + b'\n')
+        self.f.flush()
+        self.last = '{}'
+
+    def _call(self, kind, payload=b''):
+        self.f.write(HEADER.pack(kind, len(payload)))
+        self.f.write(payload)
+        self.f.flush()
+        reply = json.loads(self.f.readline())
+        return reply
+
+    def AcceptWaveform(self, data):
+        reply = self._call(b'A', data)
+        # the daemon already computed the result, keep it so Result/PartialResult need no round-trip
+        self.last = reply['result']
+        return reply['final']
+
+    def Result(self):
+        return self.last
+
+    def PartialResult(self):
+        return self.last
+
+    def FinalResult(self):
+        return self._call(b'F')['result']
+
+    def Reset(self):
+        self._call(b'R')
+        self.last = '{}'
+
+    def close(self):
+        self.f.close()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-m', '--model', type=str, default='model', metavar='MODEL_PATH',
+                        help='Path to the model')
+    parser.add_argument('--small-model', type=str, metavar='MODEL_PATH',
+                        help='serve this model while the large one is loading')
+    parser.add_argument('-s', '--socket', type=str, default=DEFAULT_SOCKET)
+    args = parser.parse_args()
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    server = Server(args.socket, Handler)
+    os.chmod(args.socket, 0o666)
+    server.models = Models(args.model, args.small_model)
+    print('listening on', args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\nDone')
+    finally:
+        os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
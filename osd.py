@@ -0,0 +1,168 @@
+'''
+On-screen display: one banner window that lives for the whole app,
+owned by its own thread and updated through a queue.
+'''
+
+import collections
+import queue
+import threading
+
+
+BACKGROUND = (30, 30, 30)
+COLOR = (250, 250, 250)
+DIM = (150, 150, 150)
+ROWS = ['title', 'status', 'body']
+# imported by the display thread, loading pygame takes a while and is not needed to start
+pg = None
+
+
+class GlyphCache:
+    """Rendered words, so a growing preview only renders the words that are new."""
+
+    def __init__(self, font, size=1024):
+        self.font = font
+        self.size = size
+        self.surfaces = collections.OrderedDict()
+
+    def get(self, word, color):
+        key = (word, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font.render(word, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+class Osd:
+    def __init__(self, height=200, font_size=45, fps=30):
+        self.height = height
+        self.font_size = font_size
+        self.fps = fps
+        self.q = queue.Queue()
+        self.thread = None
+        # set once the window is up or failed to come up, then `error` says why
+        self.ready = threading.Event()
+        self.error = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._put(('stop', None))
+
+    def show(self, title):
+        self._put(('show', title))
+
+    def status(self, text):
+        self._put(('status', text))
+
+    def partial(self, text):
+        """Transcript so far, while the instruction is being dictated."""
+        self._put(('body', text))
+
+    def preview(self, text):
+        """Edited text so far, while it streams in."""
+        # the tail is the part that is still changing
+        self._put(('body', text.replace('\n', ' ')[-120:]))
+
+    def hide(self):
+        self._put(('hide', None))
+
+    def _put(self, message):
+        # nobody reads the queue without a display
+        if self.error is None:
+            self.q.put(message)
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception as err:
+            self.error = err
+            print('Could not open the display, no on-screen banner:', err)
+        finally:
+            self.ready.set()
+
+    def _loop(self):
+        global pg
+        import pygame as pg
+        pg.init()
+        width = pg.display.Info().current_w
+        self.screen = pg.display.set_mode((width, self.height), pg.HIDDEN)
+        self.glyphs = GlyphCache(pg.font.Font(None, self.font_size))
+        row_height = self.height // len(ROWS)
+        self.rects = {row: pg.Rect(0, i * row_height, width, row_height) for i, row in enumerate(ROWS)}
+        self.texts = dict.fromkeys(ROWS, '')
+        self.visible = False
+        clock = pg.time.Clock()
+        self.ready.set()
+        while True:
+            dirty = set()
+            while True:
+                try:
+                    kind, value = self.q.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'stop':
+                    pg.quit()
+                    return
+                dirty |= self._apply(kind, value)
+            pg.event.pump()
+            if self.visible and dirty:
+                pg.display.update([self._draw(row) for row in ROWS if row in dirty])
+            # sleep longer while hidden, nothing to animate
+            clock.tick(self.fps if self.visible else 10)
+
+    def _apply(self, kind, value):
+        """Updates the state, returns the rows that need redrawing."""
+        if kind == 'hide':
+            if self.visible:
+                self.screen = pg.display.set_mode(self.screen.get_size(), pg.HIDDEN)
+                self.visible = False
+            return set()
+        if kind == 'show':
+            self.texts = {'title': value, 'status': '', 'body': ''}
+            if not self.visible:
+                self.screen = pg.display.set_mode(self.screen.get_size(), pg.SHOWN)
+                self.visible = True
+            self.screen.fill(BACKGROUND)
+            pg.display.flip()
+            return set(ROWS)
+        if self.texts[kind] == value:
+            return set()
+        self.texts[kind] = value
+        return {kind}
+
+    def _draw(self, row):
+        rect = self.rects[row]
+        self.screen.fill(BACKGROUND, rect)
+        color = DIM if row == 'status' else COLOR
+        surfaces = [self.glyphs.get(word, color) for word in self.texts[row].split()]
+        space = self.glyphs.get(' ', color).get_width()
+        width = sum(s.get_width() for s in surfaces) + space * max(0, len(surfaces) - 1)
+        # keep the end of long lines visible
+        x = max(rect.centerx - width // 2, rect.right - width - space)
+        for surface in surfaces:
+            self.screen.blit(surface, surface.get_rect(midleft=(x, rect.centery)))
+            x += surface.get_width() + space
+        return rect
+
+
+if __name__ == '__main__':
+    import time
+    osd = Osd()
+    osd.start()
+    osd.show('make it formal [Hey, what is up...]')
+    osd.status('requesting')
+    text = ''
+    for word in 'Good afternoon, how are you doing today?'.split():
+        text += word + ' '
+        osd.preview(text)
+        time.sleep(0.2)
+    osd.hide()
+    time.sleep(0.5)
+    osd.stop()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+'''
+Startup profile of the service: import time of the heaviest modules and time to each boot stage
+(audio capture, actions, hotkeys, display, model). Takes the app's options and needs root like the app:
+
+    sudo -E python profile_startup.py --model vosk-model-en-us-0.22
+'''
+
+import argparse
+import subprocess
+import sys
+import time
+
+
+def import_times(module):
+    """(seconds including its own imports, package) of every package imported, in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # submodules and nested imports of them are counted in their package
+        if '.' not in name:
+            times.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(times, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15, help='how many of the slowest imports to show')
+    parser.add_argument('--timeout', type=float, default=300, metavar='SECONDS', help='how long to wait for the model')
+    args, app_argv = parser.parse_known_args()
+
+    print(f'{"import":<32} {"seconds":>8}')
+    for seconds, name in import_times('main')[:args.top]:
+        print(f'{name:<32} {seconds:>8.3f}')
+
+    began = time.perf_counter()
+    import core
+    import main as _  # registers the actions
+    imported = time.perf_counter() - began
+    core.keyboard.send('esc') # error fast if no root
+    core.service.start(app_argv, actions=['edit'])
+    if not core.service.booted.wait(args.timeout):
+        print('not ready after', args.timeout, 'seconds')
+
+    print()
+    print(f'{"stage":<32} {"seconds":>8}')
+    print(f'{"imports":<32} {imported:>8.3f}')
+    for stage, seconds in core.service.stages:
+        print(f'{stage:<32} {imported + seconds:>8.3f}')
+    core.keyboard.unhook_all()
+
+
+if __name__ == '__main__':
+    main()
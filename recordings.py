@@ -0,0 +1,137 @@
+'''
+Background writer of recorded utterances: one WAV (or FLAC) file per recording,
+an index.jsonl linking each file to its transcript, and rotation of the oldest files.
+'''
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+INDEX = 'index.jsonl'
+
+
+class Recording:
+    """The recognition loop's handle on one file, only ever queues."""
+
+    def __init__(self, writer, name):
+        self.writer = writer
+        self.name = name
+
+    def write(self, data):
+        # the data is a view of the capture ring buffer, it has to be copied before it is reused
+        self.writer._put(('data', self.name, bytes(data)))
+
+    def close(self, text=None):
+        self.writer._put(('close', self.name, text))
+
+
+class DumpWriter:
+    def __init__(self, directory, samplerate, fmt='wav', max_files=0, max_mb=0, queue_size=256):
+        if fmt == 'flac' and soundfile is None:
+            raise BaseException('FLAC dumps require the soundfile package')
+        self.directory = directory
+        self.samplerate = samplerate
+        self.fmt = fmt
+        self.max_files = max_files
+        self.max_bytes = max_mb * 1024 * 1024
+        self.dropped = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._work, name='dump-writer', daemon=True)
+        self.thread.start()
+
+    def open(self):
+        name = time.strftime('%Y%m%d-%H%M%S') + f'-{time.time_ns() % 1000000:06d}.{self.fmt}'
+        self._put(('open', name, None))
+        return Recording(self, name)
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # losing a block of a debug recording beats stalling the recognition
+            self.dropped += 1
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self._handle(*item)
+            except Exception as err:
+                print('Could not write recording', err, file=sys.stderr)
+
+    def _handle(self, kind, name, value):
+        path = os.path.join(self.directory, name)
+        if kind == 'open':
+            self.files[name] = (self._open(path), time.time())
+        elif name not in self.files:
+            # the open was dropped, so is the rest of the recording
+            return
+        elif kind == 'data':
+            f, _ = self.files[name]
+            if self.fmt == 'wav':
+                f.writeframes(value)
+            else:
+                f.buffer_write(value, dtype='int16')
+        else:
+            f, created = self.files.pop(name)
+            frames = f.getnframes() if self.fmt == 'wav' else f.frames
+            f.close()
+            entry = {'file': name, 'text': value, 'created': created,
+                     'duration': frames / self.samplerate, 'dropped': self.dropped}
+            with open(os.path.join(self.directory, INDEX), 'a') as index:
+                index.write(json.dumps(entry) + '\n')
+            self._rotate()
+
+    def _open(self, path):
+        if self.fmt == 'flac':
+            return soundfile.SoundFile(path, 'w', self.samplerate, 1, 'PCM_16', format='FLAC')
+        f = wave.open(path, 'wb')
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(self.samplerate)
+        return f
+
+    def _rotate(self):
+        if not self.max_files and not self.max_bytes:
+            return
+        index_path = os.path.join(self.directory, INDEX)
+        with open(index_path) as index:
+            entries = [json.loads(line) for line in index if line.strip()]
+        sizes = [os.path.getsize(os.path.join(self.directory, entry['file']))
+                 if os.path.exists(os.path.join(self.directory, entry['file'])) else 0
+                 for entry in entries]
+        removed = 0
+        while removed < len(entries) - 1 and (
+                (self.max_files and len(entries) - removed > self.max_files)
+                or (self.max_bytes and sum(sizes[removed:]) > self.max_bytes)):
+            path = os.path.join(self.directory, entries[removed]['file'])
+            if os.path.exists(path):
+                os.remove(path)
+            removed += 1
+        if removed:
+            with open(index_path + '.tmp', 'w') as index:
+                index.writelines(json.dumps(entry) + '\n' for entry in entries[removed:])
+            os.replace(index_path + '.tmp', index_path)
+
+
+def make_writer(args):
+    if not args.dump_dir:
+        return None
+    return DumpWriter(args.dump_dir, args.samplerate, args.dump_format, args.dump_max_files, args.dump_max_mb)
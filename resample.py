@@ -0,0 +1,83 @@
+'''
+Resampling of the microphone stream to the model's rate (16kHz for most models) before recognition,
+so the recognizer neither resamples internally nor gets three times the samples it needs.
+
+A polyphase FIR filter computes only the output samples, with the input tail kept between blocks
+so block boundaries are seamless.
+'''
+
+import math
+import os
+import re
+
+import numpy as np
+
+
+def model_rate(path):
+    """The sample rate a Vosk model was trained on, None if its config does not say."""
+    try:
+        with open(os.path.join(path, 'conf', 'mfcc.conf')) as f:
+            match = re.search(r'--sample-frequency=(\d+)', f.read())
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+def design(up, down, zeros=8, beta=6.0, rolloff=0.9):
+    """Lowpass filter for the rate up times higher, split into `up` phases of equal length.
+
+    The cutoff is at `rolloff` of the lower Nyquist frequency and the filter spans `zeros` zero crossings
+    of it to each side.
+    """
+    factor = max(up, down)
+    taps = 2 * zeros * factor // up * up
+    cutoff = rolloff * 0.5 / factor
+    t = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(taps, beta) * up
+    # phases[p, k] weights the input sample k samples back for outputs at upsampled offset p
+    return h.reshape(-1, up).T.astype(np.float32)
+
+
+class Resampler:
+    """Converts int16 blocks from rate_in to rate_out, keeping the filter state across blocks."""
+
+    def __init__(self, rate_in, rate_out, **kwargs):
+        gcd = math.gcd(rate_in, rate_out)
+        self.rate_in = rate_in
+        self.rate_out = rate_out
+        self.up = rate_out // gcd
+        self.down = rate_in // gcd
+        self.phases = design(self.up, self.down, **kwargs)
+        self.taps = self.phases.shape[1]
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        # upsampled index of the next output, relative to the start of the next block
+        self.offset = 0
+
+    def process(self, samples):
+        x = np.concatenate([self.history, samples.astype(np.float32)])
+        count = max(0, -(-(self.up * len(samples) - self.offset) // self.down))
+        position = self.offset + np.arange(count) * self.down
+        base = position // self.up + self.taps - 1
+        windows = x[base[:, None] - np.arange(self.taps)]
+        y = np.einsum('ij,ij->i', windows, self.phases[position % self.up])
+        self.offset += count * self.down - self.up * len(samples)
+        self.history = x[len(x) - self.taps + 1:]
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+    def output_size(self, size):
+        """Output samples for `size` input samples, give or take one."""
+        return size * self.up // self.down
+
+
+def resolve(args):
+    """With --resample auto and a model trained at another rate, sets args.device_rate to the rate the device
+    is opened at and args.samplerate to the model's, which the rest of the app works at."""
+    args.device_rate = args.samplerate
+    if args.resample == 'off' or args.model_server:
+        return
+    rate = model_rate(args.model)
+    if rate is not None and rate != args.samplerate:
+        args.samplerate = rate
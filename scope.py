@@ -0,0 +1,169 @@
+'''
+Scoped editing: only the selection, or the paragraph or few lines around the cursor, go to the backend
+instead of the whole input, with a little of the surrounding text as context.
+
+The text around the cursor is read with two copies (cursor to the start, cursor to the end),
+which are local and cheap, and tells where the cursor is. What the backend returns replaces only its region:
+a selection by pasting over it, a window by selecting it with cursor keys or changing only what differs in it.
+'''
+
+import re
+
+import textdiff
+
+SCOPES = ['off', 'paragraph', 'lines']
+# apps copy a selection right away, without one most leave the clipboard alone
+SELECTION_TIMEOUT = 0.2
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count of English text for GPT tokenizers."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class Region:
+    """`document[start:end]` is what gets edited, `context` is sent along. A `selected` region is the app's
+    selection (and `document` is just that), otherwise the document is the whole input."""
+
+    def __init__(self, document, start=0, end=None, context=None, selected=False):
+        self.document = document
+        self.start = start
+        self.end = len(document) if end is None else end
+        self.context = context
+        self.selected = selected
+
+    @property
+    def text(self):
+        return self.document[self.start:self.end]
+
+    def result(self, edited):
+        return self.document[:self.start] + edited + self.document[self.end:]
+
+    def fit(self, budget, instruction, cursor=None):
+        """Trims the context, then the region around `cursor`, until the request fits `budget` tokens.
+        False if it can not be trimmed: a selection or a whole input is sent as it is or not at all."""
+        if not budget:
+            return True
+        spare = budget - estimate_tokens(instruction) - estimate_tokens(self.text)
+        if self.context and spare < estimate_tokens(self.context):
+            self.context = _shorten(self.context, max(0, spare) * CHARS_PER_TOKEN)
+        if spare >= 0:
+            return True
+        if self.selected or cursor is None:
+            return False
+        chars = (budget - estimate_tokens(instruction)) * CHARS_PER_TOKEN
+        if chars <= 0:
+            return False
+        self.start, self.end = _narrow(self.document, self.start, self.end, cursor, chars)
+        self.context = None
+        return True
+
+
+def _shorten(context, chars):
+    """The context around its [...] cut to `chars` characters, None if nothing is left."""
+    before, _, after = context.partition('[...]')
+    half = chars // 2
+    if half <= 0:
+        return None
+    return f'{before[len(before) - half:]}[...]{after[:half]}'
+
+
+def _narrow(document, start, end, cursor, chars):
+    """At most `chars` characters of start..end around the cursor. Each side is cut at a line break or a space
+    unless it stays at start or end, which are line, paragraph or document boundaries already."""
+    low = max(start, min(cursor - chars // 2, end - chars))
+    high = min(end, low + chars)
+    if low > start:
+        for separator in ('\n', ' '):
+            cut = document.find(separator, low, cursor)
+            if cut != -1:
+                low = cut + 1
+                break
+    if high < end:
+        for separator in ('\n', ' '):
+            cut = document.rfind(separator, cursor, high)
+            if cut != -1:
+                high = cut
+                break
+    return low, high
+
+
+def window(document, cursor, scope, lines):
+    """start, end of the paragraph or of `lines` lines to each side of the cursor's line."""
+    if scope == 'paragraph':
+        breaks = [m.end() for m in re.finditer(r'\n\s*\n', document[:cursor])]
+        start = breaks[-1] if breaks else 0
+        found = re.search(r'\n\s*\n', document[cursor:])
+        return start, cursor + found.start() if found else len(document)
+    start = cursor
+    for _ in range(lines + 1):
+        start = document.rfind('\n', 0, start)
+        if start == -1:
+            break
+    start += 1
+    end = cursor - 1
+    for _ in range(lines + 1):
+        end = document.find('\n', end + 1)
+        if end == -1:
+            end = len(document)
+            break
+    return start, end
+
+
+def _copy(keyboard, clipboard, keys=None, **wait):
+    """What the app copies after `keys` select something, None if it copied nothing."""
+    since = clipboard.changes()
+    if keys is not None:
+        keyboard.send(keys)
+    keyboard.send('ctrl+c')
+    if not clipboard.wait_changed(since, **wait):
+        return None
+    return clipboard.paste()
+
+
+def grab(keyboard, clipboard, scope, lines=3, context=200):
+    """The region to edit: the selection if there is one, otherwise the window around the cursor.
+    Returns the region and the cursor's offset in its document (None for a selection)."""
+    selection = _copy(keyboard, clipboard, timeout=SELECTION_TIMEOUT)
+    if selection:
+        return Region(selection, selected=True), None
+    before = _copy(keyboard, clipboard, 'ctrl+shift+home') or ''
+    if before:
+        # collapses the selection at its end, which is where the cursor was
+        keyboard.send('right')
+    after = _copy(keyboard, clipboard, 'ctrl+shift+end') or ''
+    if after:
+        # back to the cursor, so a cancel or an edit that changes nothing leaves nothing selected
+        keyboard.send('left')
+    document, cursor = before + after, len(before)
+    start, end = window(document, cursor, scope, lines)
+    surrounding = None
+    if context and (start > 0 or end < len(document)):
+        surrounding = f'{document[max(0, start - context):start]}[...]{document[end:end + context]}'
+    return Region(document, start, end, surrounding), cursor
+
+
+def apply(region, edited, keyboard, clipboard, strategy='auto'):
+    """Puts the edited text in place of the region and leaves the rest of the input alone.
+    Returns the strategy used: `diff` changed the regions that differ, `region` replaced the whole region."""
+    if edited == region.text:
+        return 'none'
+    if not region.selected and region.start == 0 and region.end == len(region.document):
+        return textdiff.apply(region.document, edited, keyboard, clipboard, strategy)
+    if not region.selected:
+        steps, used = None, 'diff'
+        if strategy != 'full':
+            edits = [(region.start + start, region.start + end, replacement)
+                     for start, end, replacement in textdiff.regions(region.text, edited)]
+            steps = textdiff.script(region.document, edits)
+        if strategy != 'diff':
+            replace = textdiff.script(region.document, [(region.start, region.end, edited)])
+            if steps is None or textdiff.cost(replace) < textdiff.cost(steps):
+                steps, used = replace, 'region'
+        textdiff.run(steps, keyboard, clipboard)
+        return used
+    clipboard.copy(edited)
+    keyboard.send('ctrl+v')
+    clipboard.wait_pasted()
+    return 'selection'
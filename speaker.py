@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+'''
+Speaker verification: enroll speakers from a few WAV utterances into a profiles file,
+then only let recordings through whose x-vector is close enough to one of them.
+
+    python speaker.py enroll anatol me1.wav me2.wav me3.wav --model model --spk-model model-spk
+'''
+
+import argparse
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+
+DEFAULT_PROFILES = 'speakers.npz'
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+class Profiles:
+    """Averaged, normalized x-vectors of enrolled speakers, one row per speaker."""
+
+    def __init__(self, path=DEFAULT_PROFILES):
+        self.path = path
+        self.names = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                self.names = [str(name) for name in data['names']]
+                self.vectors = data['vectors']
+
+    def set(self, name, vector):
+        vector = normalize(vector)
+        if name in self.names:
+            self.vectors[self.names.index(name)] = vector
+        else:
+            self.names.append(name)
+            self.vectors = vector[None] if not len(self.vectors) else np.vstack([self.vectors, vector])
+
+    def remove(self, name):
+        i = self.names.index(name)
+        del self.names[i]
+        self.vectors = np.delete(self.vectors, i, axis=0)
+
+    def save(self):
+        np.savez(self.path, names=np.array(self.names), vectors=self.vectors)
+
+    def closest(self, vector):
+        """(name, cosine distance) of the enrolled speaker closest to the x-vector."""
+        # the rows are normalized, so all distances are one matrix-vector product
+        distances = 1 - self.vectors @ normalize(vector)
+        i = int(np.argmin(distances))
+        return self.names[i], float(distances[i])
+
+
+class SpeakerGate:
+    def __init__(self, profiles, threshold=0.5):
+        if not profiles.names:
+            raise BaseException(f'no speakers enrolled in {profiles.path}, run `python speaker.py enroll`')
+        self.profiles = profiles
+        self.threshold = threshold
+
+    def check(self, result):
+        """(accepted, speaker, distance) for a recognizer result, rejects results without an x-vector."""
+        if 'spk' not in result:
+            return False, None, None
+        name, distance = self.profiles.closest(result['spk'])
+        return distance <= self.threshold, name, distance
+
+
+def make_gate(args):
+    if not args.speakers:
+        return None
+    return SpeakerGate(Profiles(args.speakers), args.spk_threshold)
+
+
+def xvector(rec, path):
+    """x-vector of a whole WAV file, the utterance x-vectors weighted by their frame counts."""
+    with wave.open(path, 'rb') as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != 'NONE':
+            raise BaseException(f'{path}: audio file must be WAV format mono PCM')
+        rec.Reset()
+        results = []
+        while True:
+            data = wf.readframes(4000)
+            if len(data) == 0:
+                break
+            if rec.AcceptWaveform(data):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+    results = [result for result in results if 'spk' in result]
+    if not results:
+        raise BaseException(f'{path}: no speech long enough for an x-vector')
+    frames = np.array([result['spk_frames'] for result in results], dtype=np.float32)
+    return normalize(frames @ normalize([result['spk'] for result in results]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default=DEFAULT_PROFILES, help='file with the enrolled speakers')
+    commands = parser.add_subparsers(dest='command', required=True)
+    enroll = commands.add_parser('enroll', help='add or replace a speaker')
+    enroll.add_argument('name')
+    enroll.add_argument('wavs', nargs='+', help='mono 16-bit WAV utterances of the speaker, 4s or longer work best')
+    enroll.add_argument('-m', '--model', default='model', help='Path to the model')
+    enroll.add_argument('--spk-model', default='model-spk', help='Path to the speaker model')
+    remove = commands.add_parser('remove', help='forget a speaker')
+    remove.add_argument('name')
+    commands.add_parser('list', help='list enrolled speakers')
+    args = parser.parse_args()
+
+    profiles = Profiles(args.profiles)
+    if args.command == 'list':
+        for name in profiles.names:
+            print(name)
+        return
+    if args.command == 'remove':
+        profiles.remove(args.name)
+        profiles.save()
+        return
+
+    import vosk
+    model = vosk.Model(args.model)
+    spk_model = vosk.SpkModel(args.spk_model)
+    vectors = []
+    for path in args.wavs:
+        with wave.open(path, 'rb') as wf:
+            samplerate = wf.getframerate()
+        rec = vosk.KaldiRecognizer(model, samplerate)
+        rec.SetSpkModel(spk_model)
+        vectors.append(xvector(rec, path))
+    profiles.set(args.name, np.mean(vectors, axis=0))
+    if len(vectors) > 1:
+        spread = 1 - normalize(vectors) @ profiles.vectors[profiles.names.index(args.name)]
+        print(f'distance of the utterances to the profile: max {spread.max():.3f}', file=sys.stderr)
+    profiles.save()
+    print(f'enrolled {args.name} from {len(vectors)} utterances into {args.profiles}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+'''
+Speculative edits: the request is sent as soon as the partial transcript stops changing,
+and the result is used if the final transcript turns out to be the same.
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+
+from edit_cache import normalize_instruction
+
+
+class Speculator:
+    def __init__(self, backend):
+        self.backend = backend
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.pending = None
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def _matches(self, text, instruction, context):
+        pending_text, pending_instruction, pending_context, _ = self.pending
+        return pending_text == text and pending_context == context and \
+            normalize_instruction(pending_instruction) == normalize_instruction(instruction)
+
+    def start(self, text, instruction, context=None):
+        if self.pending is not None and self._matches(text, instruction, context):
+            return
+        self.cancel()
+        print('Speculating:', instruction)
+        future = self.executor.submit(self.backend.edit, text, instruction, context)
+        self.pending = (text, instruction, context, future)
+
+    def cancel(self):
+        """Drops the pending request, it counts as wasted if it already went out."""
+        if self.pending is None:
+            return
+        _, _, _, future = self.pending
+        self.pending = None
+        if not future.cancel():
+            self.wasted += 1
+
+    def resolve(self, text, instruction, context=None):
+        """The speculative future if it was made for this final instruction, otherwise None."""
+        if self.pending is None:
+            return None
+        if self._matches(text, instruction, context):
+            _, _, _, future = self.pending
+            self.pending = None
+            self.hits += 1
+            print(self.stats())
+            return future
+        self.misses += 1
+        self.cancel()
+        print(self.stats())
+        return None
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return f'speculation hits {self.hits}, misses {self.misses}, wasted requests {self.wasted}, hit rate {rate:.0%}'
@@ -6,6 +6,7 @@ import queue
 import sounddevice as sd
 import vosk
 import sys
+from model_server import DEFAULT_SOCKET, RemoteRecognizer
 
 q = queue.Queue()
 
@@ -40,6 +41,9 @@ parser.add_argument(
 parser.add_argument(
     '-m', '--model', type=str, metavar='MODEL_PATH',
     help='Path to the model')
+parser.add_argument(
+    '--model-server', nargs='?', const=DEFAULT_SOCKET, metavar='SOCKET',
+    help='use the model loaded by model_server.py')
 parser.add_argument(
     '-d', '--device', type=int_or_str,
     help='input device (numeric ID or substring)')
@@ -50,7 +54,7 @@ args = parser.parse_args(remaining)
 try:
     if args.model is None:
         args.model = "model"
-    if not os.path.exists(args.model):
+    if not args.model_server and not os.path.exists(args.model):
         print ("Please download a model for your language from https://alphacephei.com/vosk/models")
         print ("and unpack as 'model' in the current folder.")
         parser.exit(0)
@@ -59,7 +63,7 @@ try:
         # soundfile expects an int, sounddevice provides a float:
         args.samplerate = int(device_info['default_samplerate'])
 
-    model = vosk.Model(args.model)
+    model = None if args.model_server else vosk.Model(args.model)
 
     if args.filename:
         dump_fn = open(args.filename, "wb")
@@ -72,7 +76,10 @@ try:
             print('Press Ctrl+C to stop the recording')
             print('#' * 80)
 
-            rec = vosk.KaldiRecognizer(model, args.samplerate)
+            if args.model_server:
+                rec = RemoteRecognizer(args.model_server, args.samplerate)
+            else:
+                rec = vosk.KaldiRecognizer(model, args.samplerate)
             while True:
                 data = q.get()
                 if rec.AcceptWaveform(data):
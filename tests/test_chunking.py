@@ -0,0 +1,70 @@
+import time
+
+import chunking
+import llm
+
+TEXT = '\n\n'.join(' '.join(f'Sentence {p}.{s} has some words.' for s in range(5)) for p in range(6))
+
+
+def test_split_joins_back_and_respects_max_chars():
+    for max_chars in (40, 100, 300, 10000):
+        chunks = chunking.split(TEXT, max_chars)
+        assert ''.join(chunks) == TEXT
+        assert all(len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_split_cuts_long_words_and_sentences():
+    text = 'x' * 50 + ' ' + 'word ' * 30
+    chunks = chunking.split(text, 20)
+    assert ''.join(chunks) == text
+    assert all(len(chunk) <= 20 for chunk in chunks)
+
+
+def test_context_is_limited_to_overlap():
+    chunks = ['aaaa ', 'bbbb ', 'cccc']
+    assert chunking._context(chunks, 1, 2) == 'a [...]cc'
+    assert chunking._context(chunks, 0, 3) == '[...]bbb'
+    assert chunking._context(chunks, 2, 100) == 'aaaa bbbb [...]'
+
+
+def test_no_overlap_means_no_neighbour_context():
+    chunks = ['aaaa ', 'bbbb ', 'cccc']
+    assert all(chunking._context(chunks, i, 0) is None for i in range(len(chunks)))
+
+
+def test_callers_context_goes_to_the_outer_chunks():
+    chunks = ['aaaa ', 'bbbb ', 'cccc']
+    assert chunking._context(chunks, 0, 0, 'X[...]Y') == 'X[...]'
+    assert chunking._context(chunks, 1, 0, 'X[...]Y') is None
+    assert chunking._context(chunks, 2, 2, 'X[...]Y') == 'b [...]Y'
+
+
+class Recorder(llm.EchoBackend):
+    def __init__(self):
+        super().__init__()
+        self.contexts = []
+
+    def edit(self, text, instruction, context=None):
+        self.contexts.append(context)
+        return super().edit(text, instruction, context)
+
+
+def test_chunked_backend_returns_the_whole_text_and_passes_context():
+    backend = Recorder()
+    chunked = chunking.ChunkedBackend(backend, max_chars=200, overlap=0, concurrency=2)
+    assert chunked.edit(TEXT, 'make it formal', 'BEFORE[...]AFTER') == TEXT
+    assert ''.join(chunked.stream(TEXT, 'make it formal')) == TEXT
+    assert any(context and context.startswith('BEFORE') for context in backend.contexts)
+    assert any(context and context.endswith('AFTER') for context in backend.contexts)
+
+
+def test_parallel_chunks_beat_one_request():
+    backend = llm.EchoBackend(token_delay=0.005)
+    began = time.perf_counter()
+    assert backend.edit(TEXT, 'make it formal') == TEXT
+    single = time.perf_counter() - began
+    # six chunks, one worker each
+    chunked = chunking.ChunkedBackend(backend, max_chars=200, overlap=0, concurrency=6)
+    began = time.perf_counter()
+    assert chunked.edit(TEXT, 'make it formal') == TEXT
+    assert time.perf_counter() - began < single / 2
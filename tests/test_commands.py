@@ -0,0 +1,44 @@
+import json
+
+import commands
+
+
+def test_control_words():
+    assert commands.control('Cancel.') == 'cancel'
+    assert commands.control('undo that') is None
+    assert commands.control(None) is None
+
+
+def test_grammar_lists_phrases_and_unk():
+    spotter = commands.CommandSpotter(['Fix typos', 'make it shorter'])
+    grammar = json.loads(spotter.grammar())
+    assert grammar[-1] == '[unk]'
+    assert {'enter', 'cancel', 'undo', 'repeat', 'fix typos', 'make it shorter'} <= set(grammar)
+
+
+def test_final_result_is_taken_right_away():
+    spotter = commands.CommandSpotter()
+    assert spotter.update('undo', True, '') == 'undo'
+
+
+def test_partial_has_to_be_stable_and_agree():
+    spotter = commands.CommandSpotter(['fix typos'], stable_blocks=2)
+    assert spotter.update('fix typos', False, 'fix typos') is None
+    assert spotter.update('fix typos', False, 'fix typos') is None
+    assert spotter.update('fix typos', False, 'fix typos the') is None
+    assert spotter.update('fix typos', False, 'fix typos') == 'fix typos'
+
+
+def test_unknown_words_reset():
+    spotter = commands.CommandSpotter(stable_blocks=1)
+    assert spotter.update('undo', False, 'undo') is None
+    assert spotter.update('undo [unk]', False, 'undo the last change') is None
+    assert spotter.update('undo', False, 'undo') is None
+    assert spotter.update('undo', False, 'undo') == 'undo'
+
+
+def test_load_instructions(tmp_path):
+    path = tmp_path / 'instructions.txt'
+    path.write_text('Fix typos  # the usual\n\n# comment\nMake it shorter!\n')
+    assert commands.load_instructions(str(path)) == ['fix typos', 'make it shorter']
+    assert commands.load_instructions(None) == []
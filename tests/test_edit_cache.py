@@ -0,0 +1,51 @@
+import argparse
+
+import edit_cache
+import llm
+
+
+class Backend(llm.EchoBackend):
+    def __init__(self, temperature):
+        super().__init__()
+        self.temperature = temperature
+        self.calls = 0
+
+    def edit(self, text, instruction, context=None):
+        self.calls += 1
+        return super().edit(text, instruction, context)
+
+
+def options(path, **kw):
+    defaults = dict(no_cache=False, cache_file=str(path), cache_size=1000, cache_ttl=3600,
+                    clear_cache=False, cache_nondeterministic=False)
+    return argparse.Namespace(**{**defaults, **kw})
+
+
+def test_nondeterministic_backend_is_not_cached_and_no_file_is_created(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    backend = Backend(0.7)
+    assert edit_cache.wrap(backend, options(path)) is backend
+    assert not path.exists()
+
+
+def test_repeated_edits_are_served_from_the_cache(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    backend = Backend(0)
+    cached = edit_cache.wrap(backend, options(path))
+    assert isinstance(cached, edit_cache.CachedBackend)
+    assert cached.edit('some text', 'Fix typos.') == 'some text'
+    assert cached.edit('some text', 'fix typos') == 'some text'
+    assert backend.calls == 1
+    assert ''.join(cached.stream('some text', 'fix typos')) == 'some text'
+    assert ''.join(cached.stream('some text', 'fix typos')) == 'some text'
+    assert path.exists()
+
+
+def test_clear_cache_empties_it_even_when_it_is_not_used(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    backend = Backend(0)
+    edit_cache.wrap(backend, options(path)).edit('some text', 'fix typos')
+    hot = Backend(0.7)
+    assert edit_cache.wrap(hot, options(path, clear_cache=True)) is hot
+    edit_cache.wrap(backend, options(path)).edit('some text', 'fix typos')
+    assert backend.calls == 2
@@ -0,0 +1,33 @@
+import pytest
+
+import fastpath
+
+
+@pytest.mark.parametrize('text, instruction, rule, expected', [
+    ('Hello there.', 'uppercase everything', 'uppercase', 'HELLO THERE.'),
+    ('Hello There.', 'make it lowercase', 'lowercase', 'hello there.'),
+    ('one. two. three.\n', 'delete the last sentence', 'delete last sentence', 'one. two.\n'),
+    ('one. two.', 'remove the first sentence', 'delete first sentence', 'two.'),
+    ('a\nb\nc', 'remove line breaks', 'remove line breaks', 'a b c'),
+    ('Done', 'add a period', 'add period', 'Done.'),
+    ('Done.  ', 'add a period', 'add period', 'Done.  '),
+    ('I like foo and Foo.', 'replace foo with bar', 'replace', 'I like bar and bar.'),
+    ('I like foo.', 'Replace foo with Bar.', 'replace', 'I like Bar.'),
+])
+def test_mechanical_instructions_run_locally(text, instruction, rule, expected):
+    assert fastpath.FastPath().apply(text, instruction) == (rule, expected)
+
+
+@pytest.mark.parametrize('text, instruction', [
+    ('I think it is good.', 'change it to past tense'),
+    ('Is this ok', 'change this to a question'),
+    ('Do it now', 'change it to be more polite'),
+    ('The cat sat', 'replace the cat with a dog'),
+    ('Call it soon', 'replace it with something better'),
+    ('I like foo.', 'replace baz with bar'),
+    ('Some text', 'make it more formal'),
+])
+def test_other_instructions_go_to_the_backend(text, instruction):
+    fast = fastpath.FastPath()
+    assert fast.apply(text, instruction) is None
+    assert fast.misses == 1
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def blocking_runner():
+    started, ran = threading.Event(), []
+
+    def run(job):
+        ran.append(job.id)
+        started.set()
+        while True:
+            job.check()
+            time.sleep(0.01)
+    return jobs.JobRunner(run), started, ran
+
+
+def test_cancel_stops_the_running_and_the_queued_jobs():
+    runner, started, ran = blocking_runner()
+    first = runner.submit()
+    assert started.wait(5)
+    second = runner.submit()
+    runner.cancel()
+    wait_for(lambda: second.state == jobs.CANCELED)
+    assert first.state == jobs.CANCELED
+    assert ran == [first.id]
+
+
+def test_jobs_submitted_after_a_cancel_run():
+    runner, started, ran = blocking_runner()
+    runner.cancel()
+    job = runner.submit()
+    assert started.wait(5)
+    assert ran == [job.id]
+    runner.cancel()
+    wait_for(lambda: job.state == jobs.CANCELED)
+
+
+def test_full_queue_ignores_presses():
+    runner, started, _ = blocking_runner()
+    runner.submit()
+    assert started.wait(5)
+    assert runner.submit() is not None
+    assert runner.submit() is not None
+    assert runner.submit() is None
+    runner.cancel()
+
+
+def test_call_walks_away_from_a_canceled_job():
+    job = jobs.Job()
+    release = threading.Event()
+    threading.Timer(0.1, job.cancel).start()
+    began = time.monotonic()
+    with pytest.raises(jobs.Canceled):
+        job.call(release.wait)
+    assert time.monotonic() - began < 1
+    release.set()
+    assert jobs.Job().call(lambda x: x * 2, 21) == 42
@@ -0,0 +1,37 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import fake_llm_server
+import llm
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(fake_llm_server, 'token_delay', 0)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), fake_llm_server.Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/v1'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_stream_yields_tokens(server):
+    backend = llm.HttpBackend(server)
+    text = 'The quick brown fox\njumps over the lazy dog.'
+    pieces = list(backend.stream(text, 'fix typos', context='before[...]after'))
+    assert len(pieces) > 1
+    assert ''.join(pieces) == text
+
+
+def test_http_edit_matches_stream(server):
+    backend = llm.HttpBackend(server)
+    assert backend.edit('one two three', 'fix typos') == ''.join(backend.stream('one two three', 'fix typos'))
+
+
+def test_openai_edit_uses_chat_without_engine(server):
+    backend = llm.OpenAiBackend('key', server)
+    assert backend.edit('hello there', 'fix typos') == 'hello there'
+    backend = llm.OpenAiBackend('key', server, engine='text-davinci-edit-001')
+    assert backend.edit('hello there', 'fix typos') == 'hello there'
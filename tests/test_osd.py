@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+import osd
+
+pytest.importorskip('pygame')
+
+
+@pytest.fixture
+def display(monkeypatch):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    banner = osd.Osd(height=90, font_size=20)
+    drawn = []
+    draw = banner._draw
+
+    def record(row):
+        drawn.append(row)
+        return draw(row)
+    banner._draw = record
+    banner.start()
+    assert banner.ready.wait(10)
+    assert banner.error is None
+    yield banner, drawn
+    banner.stop()
+    banner.thread.join(5)
+
+
+def settle(banner):
+    """Waits until the display thread handled everything sent so far."""
+    while not banner.q.empty():
+        time.sleep(0.01)
+    # the loop handles a batch before it sleeps for up to a tenth of a second
+    time.sleep(0.25)
+
+
+def test_show_draws_all_rows(display):
+    banner, drawn = display
+    banner.show('fix typos')
+    settle(banner)
+    assert banner.visible
+    assert sorted(drawn) == sorted(osd.ROWS)
+    assert banner.texts == {'title': 'fix typos', 'status': '', 'body': ''}
+
+
+def test_updates_redraw_only_changed_rows(display):
+    banner, drawn = display
+    banner.show('fix typos')
+    settle(banner)
+    drawn.clear()
+    banner.status('requesting')
+    settle(banner)
+    assert drawn == ['status']
+    drawn.clear()
+    banner.status('requesting')
+    banner.preview('Hello\nthere')
+    settle(banner)
+    assert drawn == ['body']
+    assert banner.texts['body'] == 'Hello there'
+
+
+def test_hidden_banner_is_not_drawn(display):
+    banner, drawn = display
+    banner.show('fix typos')
+    banner.hide()
+    settle(banner)
+    drawn.clear()
+    banner.partial('make it')
+    settle(banner)
+    assert not banner.visible
+    assert drawn == []
+    banner.show('make it formal')
+    settle(banner)
+    assert banner.visible and sorted(drawn) == sorted(osd.ROWS)
+
+
+def test_stop_ends_the_thread(display):
+    banner, _ = display
+    banner.stop()
+    banner.thread.join(5)
+    assert not banner.thread.is_alive()
+
+
+def test_ready_is_set_when_the_display_can_not_be_opened(monkeypatch):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'no-such-driver')
+    banner = osd.Osd()
+    banner.start()
+    assert banner.ready.wait(10)
+    assert banner.error is not None
+    banner.show('fix typos')
+    assert banner.q.empty()
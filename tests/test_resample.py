@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from resample import Resampler
+
+
+def tone(rate, frequency, seconds=1.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (10000 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+@pytest.mark.parametrize('rate_in', [44100, 48000, 22050, 8000])
+@pytest.mark.parametrize('block', [441, 1000, 4800])
+def test_blocks_give_the_same_samples_as_one_call(rate_in, block):
+    samples = tone(rate_in, 440)
+    whole = Resampler(rate_in, 16000).process(samples)
+    resampler = Resampler(rate_in, 16000)
+    blocks = np.concatenate([resampler.process(samples[i:i + block]) for i in range(0, len(samples), block)])
+    np.testing.assert_array_equal(blocks, whole)
+    assert abs(len(whole) - len(samples) * 16000 // rate_in) <= 1
+
+
+def test_passband_kept_and_aliases_removed():
+    def level(frequency):
+        out = Resampler(48000, 16000).process(tone(48000, frequency))[1000:-1000].astype(float)
+        return np.sqrt(np.mean(out ** 2)) / (10000 / np.sqrt(2))
+    assert level(440) == pytest.approx(1, abs=0.02)
+    assert level(12000) < 0.01
+
+
+def test_reset_starts_over():
+    resampler = Resampler(48000, 16000)
+    samples = tone(48000, 300, 0.1)
+    first = resampler.process(samples)
+    resampler.reset()
+    np.testing.assert_array_equal(resampler.process(samples), first)
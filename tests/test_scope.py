@@ -0,0 +1,80 @@
+import pytest
+
+import scope
+from clipboard import MockClipboard
+from fake_keyboard import FakeKeyboard
+
+LINES = '\n'.join(f'line {i} with some words' for i in range(10))
+
+
+def test_lines_window_around_cursor():
+    cursor = LINES.index('line 5') + 3
+    start, end = scope.window(LINES, cursor, 'lines', 1)
+    assert LINES[start:end] == 'line 4 with some words\nline 5 with some words\nline 6 with some words'
+
+
+def test_lines_window_is_clipped_at_the_document_edges():
+    assert scope.window(LINES, 0, 'lines', 2) == (0, LINES.index('line 3') - 1)
+    start, end = scope.window(LINES, len(LINES), 'lines', 0)
+    assert LINES[start:end] == 'line 9 with some words'
+    assert scope.window('', 0, 'lines', 1) == (0, 0)
+
+
+def test_paragraph_window():
+    text = 'para one\nstill one\n\npara two\nmore two\n\npara three'
+    start, end = scope.window(text, text.index('two\nmore'), 'paragraph', 0)
+    assert text[start:end] == 'para two\nmore two'
+    start, end = scope.window(text, len(text), 'paragraph', 0)
+    assert text[start:end] == 'para three'
+
+
+def test_narrow_cuts_at_words_with_cursor_at_the_end():
+    text = 'The quick brown fox jumps over the lazy dog.'
+    assert scope._narrow(text, 0, len(text), len(text), 8) == (text.index('dog'), len(text))
+
+
+def test_narrow_cuts_at_words_with_cursor_at_the_start():
+    text = 'The quick brown fox jumps over the lazy dog.'
+    assert scope._narrow(text, 0, len(text), 0, 8) == (0, 3)
+
+
+def test_narrow_prefers_line_breaks_and_keeps_the_cursor():
+    cursor = LINES.index('line 5') + 3
+    start, end = scope._narrow(LINES, 0, len(LINES), cursor, 60)
+    assert start <= cursor <= end
+    assert LINES[start - 1] == '\n' and LINES[end] == '\n'
+    assert end - start <= 60
+
+
+def test_fit_trims_context_before_the_region():
+    region = scope.Region(LINES, 0, 22, context='x' * 400 + '[...]' + 'y' * 400)
+    assert region.fit(50, 'fix typos', cursor=5)
+    assert region.text == 'line 0 with some words'
+    assert len(region.context) < 200
+
+
+def test_fit_refuses_what_it_can_not_narrow():
+    assert not scope.Region(LINES, selected=True).fit(10, 'fix typos')
+    assert not scope.Region(LINES).fit(10, 'fix typos')
+    assert scope.Region(LINES).fit(0, 'fix typos')
+
+
+@pytest.mark.parametrize('cursor', [0, 5, len(LINES)])
+def test_grab_leaves_the_cursor_where_it_was(cursor):
+    clipboard = MockClipboard()
+    keyboard = FakeKeyboard(clipboard)
+    keyboard.document, keyboard.cursor = LINES, cursor
+    region, found = scope.grab(keyboard, clipboard, 'lines', lines=1)
+    assert found == cursor
+    assert region.document == LINES
+    # nothing selected, the next key press does not replace any text
+    assert keyboard._selection() == (cursor, cursor)
+
+
+def test_grab_takes_the_selection_as_it_is():
+    clipboard = MockClipboard()
+    keyboard = FakeKeyboard(clipboard)
+    keyboard.document, keyboard.anchor, keyboard.cursor = LINES, 5, 18
+    region, found = scope.grab(keyboard, clipboard, 'lines')
+    assert (region.text, region.selected, found) == (LINES[5:18], True, None)
+    assert (keyboard.anchor, keyboard.cursor) == (5, 18)
@@ -0,0 +1,46 @@
+import pytest
+
+import textdiff
+from clipboard import MockClipboard
+from fake_keyboard import FakeKeyboard
+
+CASES = [
+    ('hello world', 'hello there world'),
+    ('The quick brown fox.\nJumps over\nthe lazy dog.', 'The quick red fox.\nJumps over\nthe lazy cat.'),
+    ('line one\nline two\nline three', 'line one\nline three'),
+    ('abc', ''),
+    ('', 'new text'),
+    ('first\nsecond', 'first\ninserted\nsecond\nlast'),
+]
+
+
+def editor(text):
+    clipboard = MockClipboard()
+    keyboard = FakeKeyboard(clipboard)
+    keyboard.document = text
+    keyboard.cursor = len(text)
+    return keyboard, clipboard
+
+
+@pytest.mark.parametrize('strategy', ['auto', 'full', 'diff'])
+@pytest.mark.parametrize('old, new', CASES)
+def test_apply_turns_old_into_new(old, new, strategy):
+    keyboard, clipboard = editor(old)
+    used = textdiff.apply(old, new, keyboard, clipboard, strategy)
+    assert keyboard.document == new
+    if strategy != 'auto':
+        assert used == strategy
+
+
+def test_small_change_in_large_text_is_applied_in_place():
+    old = '\n'.join(f'line {i} of a long document' for i in range(200))
+    new = old.replace('line 150 of', 'line 150 in')
+    keyboard, clipboard = editor(old)
+    assert textdiff.apply(old, new, keyboard, clipboard) == 'diff'
+    assert keyboard.document == new
+
+
+def test_unchanged_text_is_left_alone():
+    keyboard, clipboard = editor('same')
+    assert textdiff.apply('same', 'same', keyboard, clipboard) == 'none'
+    assert keyboard.presses == 0
@@ -0,0 +1,50 @@
+import numpy as np
+
+from vad import EnergyVad
+
+RATE = 16000
+
+
+def blocks(samples, size=1600):
+    return [samples[i:i + size].tobytes() for i in range(0, len(samples), size)]
+
+
+def speech(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (3000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(RATE * seconds), dtype=np.int16)
+
+
+def feed(vad, samples):
+    """Index of the block that ended the utterance, None if none did."""
+    for i, block in enumerate(blocks(samples)):
+        if vad.update(block):
+            return i
+    return None
+
+
+def test_ends_after_speech_and_silence():
+    vad = EnergyVad(RATE, threshold=500, silence=0.5)
+    # 1s of speech, then the utterance ends in the 5th or 6th block of silence
+    assert feed(vad, np.concatenate([speech(1.0), silence(1.0)])) in (14, 15)
+
+
+def test_silence_alone_never_ends():
+    assert feed(EnergyVad(RATE, silence=0.3), silence(2.0)) is None
+
+
+def test_loud_hiss_is_not_speech():
+    noise = np.random.default_rng(0).integers(-900, 900, RATE * 2).astype(np.int16)
+    assert feed(EnergyVad(RATE, threshold=500, silence=0.3), noise) is None
+
+
+def test_odd_block_sizes_carry_over():
+    vad = EnergyVad(RATE, silence=0.3)
+    samples = np.concatenate([speech(0.5), silence(0.6)])
+    ended = [vad.update(samples[i:i + 333].tobytes()) for i in range(0, len(samples), 333)]
+    assert any(ended)
+    vad.reset()
+    assert not vad.heard_speech
@@ -0,0 +1,144 @@
+'''
+Applies an edit to the focused input by changing only the regions that differ,
+with synthetic cursor keys, selection and typing or pasting.
+
+Cursor moves assume a plain text input: no soft wrapping and `end` going to the end of the line.
+'''
+
+import difflib
+import re
+
+# rough cost of each action in units of one synthetic key press
+KEY_COST = 1.0
+TYPE_CHAR_COST = 1.0
+PASTE_COST = 3.0
+# editors re-layout what gets pasted, large pastes are not free
+PASTE_CHAR_COST = 0.02
+MERGE_GAP = 8
+
+
+def tokens(text):
+    return re.findall(r'\w+|\s+|[^\w\s]', text)
+
+
+def _offsets(parts):
+    offsets = [0]
+    for part in parts:
+        offsets.append(offsets[-1] + len(part))
+    return offsets
+
+
+def _changes(old, new, split, base=0):
+    a, b = split(old), split(new)
+    a_offsets, b_offsets = _offsets(a), _offsets(b)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != 'equal':
+            yield op, base + a_offsets[i1], base + a_offsets[i2], new[b_offsets[j1]:b_offsets[j2]]
+
+
+def regions(old, new):
+    """(start, end, replacement) of every changed region, in offsets of `old`, in order."""
+    found = []
+    # lines first, so the token level diff only runs on the few lines that changed
+    for op, start, end, replacement in _changes(old, new, lambda text: text.splitlines(keepends=True)):
+        if op == 'replace':
+            changes = [change[1:] for change in _changes(old[start:end], replacement, tokens, start)]
+        else:
+            changes = [(start, end, replacement)]
+        for start, end, replacement in changes:
+            previous = found[-1] if found else None
+            # close regions on one line are cheaper to select together than to navigate to twice
+            if previous and start - previous[1] <= MERGE_GAP and '\n' not in old[previous[1]:start]:
+                found[-1] = (previous[0], end, previous[2] + old[previous[1]:start] + replacement)
+            else:
+                found.append((start, end, replacement))
+    return found
+
+
+def script(old, edits):
+    """Key presses and text to turn `old` into the edited text, last region first so offsets stay valid."""
+    steps = []
+    last_line = old.count('\n')
+    line_now = None
+    for start, end, replacement in reversed(edits):
+        line = old.count('\n', 0, start)
+        col = start - (old.rfind('\n', 0, start) + 1)
+        if line == 0:
+            steps.append(('send', 'ctrl+home'))
+        else:
+            if line_now is None:
+                # start from whichever end of the document is closer
+                if line - 1 < last_line - (line - 1):
+                    steps.append(('send', 'ctrl+home'))
+                    line_now = 0
+                else:
+                    steps.append(('send', 'ctrl+end'))
+                    line_now = last_line
+            target = line - 1
+            key = 'down' if target > line_now else 'up'
+            steps += [('send', key)] * abs(target - line_now)
+            # `home` is "smart" in many editors, end of the previous line + right is not
+            steps += [('send', 'end'), ('send', 'right')]
+        steps += [('send', 'right')] * col
+        steps += [('send', 'shift+right')] * (end - start)
+        if replacement:
+            typing = len(replacement) * TYPE_CHAR_COST
+            pasting = PASTE_COST + len(replacement) * PASTE_CHAR_COST
+            if '\n' in replacement or pasting < typing:
+                steps.append(('paste', replacement))
+            else:
+                steps.append(('write', replacement))
+        else:
+            steps.append(('send', 'delete'))
+        line_now = line + replacement.count('\n')
+    return steps
+
+
+def cost(steps):
+    total = 0.0
+    for kind, value in steps:
+        if kind == 'send':
+            total += KEY_COST
+        elif kind == 'write':
+            total += len(value) * TYPE_CHAR_COST
+        else:
+            total += PASTE_COST + len(value) * PASTE_CHAR_COST
+    return total
+
+
+def full_cost(new):
+    return KEY_COST + PASTE_COST + len(new) * PASTE_CHAR_COST
+
+
+def apply(old, new, keyboard, clipboard, strategy='auto'):
+    """Makes the focused input, which holds `old`, hold `new`, `clipboard` is a clipboard.Clipboard.
+    Returns the strategy used."""
+    if old == new:
+        return 'none'
+    steps = None
+    if strategy != 'full':
+        steps = script(old, regions(old, new))
+        if strategy == 'auto' and full_cost(new) <= cost(steps):
+            steps = None
+    if steps is None:
+        clipboard.copy(new)
+        keyboard.send('ctrl+a')
+        keyboard.send('ctrl+v')
+        clipboard.wait_pasted()
+        return 'full'
+    run(steps, keyboard, clipboard)
+    return 'diff'
+
+
+def run(steps, keyboard, clipboard):
+    for kind, value in steps:
+        if kind == 'send':
+            keyboard.send(value)
+        elif kind == 'write':
+            keyboard.write(value)
+        else:
+            clipboard.copy(value)
+            keyboard.send('ctrl+v')
+            # the next copy must not replace the text before the app has read it
+            clipboard.wait_pasted()
@@ -0,0 +1,145 @@
+'''
+Per-edit latency tracing: monotonic timestamps of pipeline events, one JSONL record per edit,
+and histograms of the stages between them.
+'''
+
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EVENTS = ['hotkey_release', 'stream_open', 'first_partial', 'final_text', 'llm_request',
+          'first_byte', 'response_complete', 'paste_done', 'clipboard_restored']
+# stage name: (from event, to event)
+STAGES = {
+    'speech': ('stream_open', 'final_text'),
+    'first_partial': ('stream_open', 'first_partial'),
+    'llm_first_byte': ('llm_request', 'first_byte'),
+    'llm': ('llm_request', 'response_complete'),
+    'paste': ('response_complete', 'paste_done'),
+    'restore': ('paste_done', 'clipboard_restored'),
+    'total': ('hotkey_release', 'clipboard_restored'),
+}
+BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf')]
+
+
+class Trace:
+    """Timestamps of one edit, in seconds since the hotkey was released."""
+
+    def __init__(self, start=None):
+        self.start = time.monotonic() if start is None else start
+        self.wall = time.time() - (time.monotonic() - self.start)
+        self.events = {'hotkey_release': 0.0}
+        self.tags = {}
+
+    def mark(self, event):
+        # only the first occurrence counts, e.g. the first of many partials
+        self.events.setdefault(event, time.monotonic() - self.start)
+
+    def tag(self, key, value):
+        self.tags[key] = value
+
+    def stages(self):
+        return {name: self.events[end] - self.events[begin]
+                for name, (begin, end) in STAGES.items()
+                if begin in self.events and end in self.events}
+
+    def record(self):
+        return {'time': self.wall, 'events': self.events, 'stages': self.stages(), **self.tags}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= q * self.count:
+                return bound
+        return float('inf')
+
+
+class Tracer:
+    def __init__(self, path=None, max_bytes=10 * 1024 * 1024, backups=3, summary_every=0):
+        self.histograms = {name: Histogram() for name in STAGES}
+        self.summary_every = summary_every
+        self.finished = 0
+        self.lock = threading.Lock()
+        self.log = None
+        if path:
+            self.log = logging.getLogger('voice-assistant.trace')
+            self.log.propagate = False
+            self.log.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.log.addHandler(handler)
+
+    def finish(self, trace, outcome):
+        trace.tag('outcome', outcome)
+        record = trace.record()
+        with self.lock:
+            for name, value in record['stages'].items():
+                self.histograms[name].observe(value)
+            self.finished += 1
+            show_summary = self.summary_every and self.finished % self.summary_every == 0
+        if self.log is not None:
+            self.log.info(json.dumps(record))
+        if show_summary:
+            print(self.summary())
+
+    def summary(self):
+        lines = [f'{"stage":<16} {"count":>6} {"mean":>7} {"p50<=":>6} {"p90<=":>6}']
+        with self.lock:
+            for name, h in self.histograms.items():
+                if h.count:
+                    lines.append(f'{name:<16} {h.count:>6} {h.sum / h.count:>7.3f} '
+                                 f'{h.quantile(0.5):>6} {h.quantile(0.9):>6}')
+        return '\n'.join(lines)
+
+    def prometheus(self):
+        lines = ['# TYPE voice_assistant_stage_seconds histogram']
+        with self.lock:
+            for name, h in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f'voice_assistant_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'voice_assistant_stage_seconds_sum{{stage="{name}"}} {h.sum}')
+                lines.append(f'voice_assistant_stage_seconds_count{{stage="{name}"}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port):
+        """Serves prometheus() on http://127.0.0.1:port/metrics from a background thread."""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = tracer.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
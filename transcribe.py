@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+'''
+Offline transcription of WAV files with a pool of worker processes, each loading the model once.
+Prints one JSON line per file with the text, word timings and real-time factor,
+and the word error rate if reference transcripts are given (e.g. a --dump-dir index.jsonl).
+'''
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import wave
+
+import vosk
+
+model = None
+recognizers = {}
+
+
+def _init_worker(model_path):
+    global model
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(model_path)
+
+
+def transcribe(job):
+    path, block_seconds = job
+    began = time.perf_counter()
+    try:
+        wf = wave.open(path, 'rb')
+    except (OSError, wave.Error) as err:
+        return {'file': path, 'error': str(err)}
+    with wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != 'NONE':
+            return {'file': path, 'error': 'must be mono 16-bit PCM'}
+        samplerate = wf.getframerate()
+        if samplerate not in recognizers:
+            recognizers[samplerate] = vosk.KaldiRecognizer(model, samplerate)
+            recognizers[samplerate].SetWords(True)
+        rec = recognizers[samplerate]
+        rec.Reset()
+        duration = wf.getnframes() / samplerate
+        results = []
+        while True:
+            data = wf.readframes(int(block_seconds * samplerate))
+            if len(data) == 0:
+                break
+            if rec.AcceptWaveform(data):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+    elapsed = time.perf_counter() - began
+    words = [word for result in results for word in result.get('result', [])]
+    return {
+        'file': path,
+        'text': ' '.join(result['text'] for result in results if result.get('text')),
+        'words': words,
+        'duration': duration,
+        'elapsed': elapsed,
+        'rtf': elapsed / duration if duration else 0.0,
+    }
+
+
+def word_errors(reference, hypothesis):
+    """Substitutions, deletions and insertions to turn one word list into the other."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i]
+        for j, hyp in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp)))
+        previous = current
+    return previous[-1]
+
+
+def load_references(path):
+    """file name -> text, from JSON lines with 'file' and 'text' like the --dump-dir index."""
+    references = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get('text') is not None:
+                    references[os.path.basename(entry['file'])] = entry['text']
+    return references
+
+
+def _available_bytes():
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def pool_size(model_path, model_mb=None):
+    """One worker per core, as long as every worker's copy of the model fits in the available RAM."""
+    cores = os.cpu_count() or 1
+    available = _available_bytes()
+    if available is None:
+        return cores
+    # a loaded model takes about as much memory as it takes on disk
+    per_worker = (model_mb * 1024 * 1024) if model_mb else max(_dir_bytes(model_path), 1)
+    return max(1, min(cores, available // per_worker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('inputs', nargs='+', help='WAV files or directories with them')
+    parser.add_argument('-m', '--model', default='model', help='Path to the model')
+    parser.add_argument('-o', '--output', help='JSONL file to write, standard output by default')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes, by default as many as cores and RAM allow')
+    parser.add_argument('--model-mb', type=float, help='memory one loaded model takes, by default its size on disk')
+    parser.add_argument('--block-seconds', type=float, default=4.0, help='audio fed to the recognizer at once')
+    parser.add_argument('--references', metavar='JSONL',
+                        help="reference transcripts as JSON lines with 'file' and 'text', e.g. a --dump-dir index.jsonl")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        parser.exit(1, f'no model at {args.model}\n')
+    paths = []
+    for path in args.inputs:
+        paths += sorted(glob.glob(os.path.join(path, '*.wav'))) if os.path.isdir(path) else [path]
+    references = load_references(args.references) if args.references else {}
+    jobs = args.jobs or pool_size(args.model, args.model_mb)
+    print(f'transcribing {len(paths)} files with {jobs} workers', file=sys.stderr)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    began = time.perf_counter()
+    audio = 0.0
+    errors = 0
+    reference_words = 0
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(args.model,)) as pool:
+        for result in pool.imap_unordered(transcribe, [(path, args.block_seconds) for path in paths]):
+            reference = references.get(os.path.basename(result['file']))
+            if reference and reference.split() and 'text' in result:
+                ref_words = reference.lower().split()
+                result['errors'] = word_errors(ref_words, result['text'].lower().split())
+                result['wer'] = result['errors'] / len(ref_words)
+                errors += result['errors']
+                reference_words += len(ref_words)
+            audio += result.get('duration', 0.0)
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    elapsed = time.perf_counter() - began
+    if out is not sys.stdout:
+        out.close()
+
+    summary = f'{audio:.1f}s of audio in {elapsed:.1f}s, real-time factor {elapsed / audio if audio else 0:.3f}'
+    if reference_words:
+        summary += f', WER {errors / reference_words:.1%} over {reference_words} words'
+    print(summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''
+Energy based voice activity detection to end utterances without waiting for Kaldi's endpointer.
+'''
+
+import numpy as np
+
+
+def frame_features(data, frame):
+    """RMS and zero-crossing rate of each full frame of int16 audio."""
+    samples = np.frombuffer(data, dtype=np.int16)
+    n = len(samples) // frame
+    frames = samples[:n * frame].reshape(n, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+    return rms, zcr
+
+
+class EnergyVad:
+    """Says when speech was heard and then followed by `silence` seconds of quiet."""
+
+    def __init__(self, samplerate, threshold=500, silence=0.6, frame_ms=20, max_zcr=0.4):
+        self.frame = max(1, int(samplerate * frame_ms / 1000))
+        self.threshold = threshold
+        self.max_zcr = max_zcr
+        self.silence_frames = int(silence * 1000 / frame_ms)
+        self.reset()
+
+    def reset(self):
+        self.heard_speech = False
+        self.quiet_frames = 0
+        self.rest = np.zeros(0, dtype=np.int16)
+
+    def is_speech(self, rms, zcr):
+        # loud hiss crosses zero all the time, voiced speech does not
+        return (rms > self.threshold) & ((zcr < self.max_zcr) | (rms > 2 * self.threshold))
+
+    def update(self, data):
+        """Feeds a block, returns True once the utterance is over."""
+        samples = np.frombuffer(data, dtype=np.int16)
+        if len(self.rest):
+            samples = np.concatenate([self.rest, samples])
+        usable = len(samples) // self.frame * self.frame
+        self.rest = samples[usable:].copy()
+        if usable == 0:
+            return False
+        speech = self.is_speech(*frame_features(samples[:usable], self.frame))
+        voiced = np.flatnonzero(speech)
+        if len(voiced):
+            self.heard_speech = True
+            self.quiet_frames = len(speech) - 1 - voiced[-1]
+        else:
+            self.quiet_frames += len(speech)
+        return self.heard_speech and self.quiet_frames >= self.silence_frames